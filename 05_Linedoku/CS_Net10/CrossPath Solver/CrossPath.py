@@ -1,74 +1,61 @@
 # CrossPath solver
 # 2017-09-14    PV
 # 2017-11-12    PV      Added TestExploreAll for brute force exploration part (to come)
+# 2026-10-18    PV      Brute force exploration done by puzzle.Search(), TestExploreAll removed
+# 2026-10-18    PV      Alternative exact cover solver puzzle.SolveExactCover()
+# 2026-10-18    PV      Puzzles read from files (sample puzzles moved to samples.txt), batch mode on all cores
+# 2026-10-18    PV      count solver to check that a puzzle has a unique solution
+# 2026-10-18    PV      --cache option, persistent cache of results shared by rotations and mirror images
+# 2026-10-18    PV      Unsolved (rules stuck) status for rules only solvers, instead of No solution
+
+import sys
+import json
+import argparse
 
 from puzzle import *
+from puzzlefile import ReadPuzzles, samplesFile
+from batch import SolveStream, solvers
+from solutioncache import SolutionCache
 
-# Les puzzles sont définis comme une liste de chaînes, une par ligne, chaque
-# caractère de la chaîne étant:
+# Les puzzles sont définis dans des fichiers texte (voir puzzlefile.py), un bloc de
+# lignes par puzzle, chaque caractère d'une ligne étant:
 # 1-9 Centre de réserve d’extension
 # .  libre
 # X cellule bloquée
-medium_10 = [".6....2",
-".....X.",
-"..1.4..",
-"...4.X.",
-"3.4....",
-".4....4",
-"X...3.X"]
-
-
-master_1 = ["...5....XXX",
-"..6.....3..",
-"2..1.X.....",
-".2....3..3.",
-"X...5..6X.3",
-"3....2...5.",
-".XX.X.5...X",
-"...9...XX..",
-"4...3..3...",
-".X...X...1.",
-"..2X.XX...6"]
-
-test_4 = ["2.X1",
-"..X.",
-".1.2",
-"3...",]
-
-medium_36 = ["X.1.X..",
-".2...3.",
-"..2.X.4",
-"...7...",
-".XX.2..",
-"3.....5",
-".3...1.",]
-
-def TestExploreAll():
-    N = 3
-    S = 0
-    E = 4
-    W = 2
-    c = 4
-    nl = 0
-    ns = 0
-    # Find all moves combinations that use exactly c points
-    for iN in range(1 + min(N, c)):
-        for iS in range(1 + min(c - iN, S)):
-            for iE in range(1 + min(c - iN - iS, E)):
-                for iW in range(1 + min(c - iN - iS - iE, W)):
-                    nl += 1
-                    if iN + iS + iE + iW == c:
-                        ns += 1
-                        print('N%d S%d E%d W%d' % (iN, iS, iE, iW))
-    print(nl,' loops, ',ns, ' solutions')
-#TestExploreAll()
 
-#p = puzzle(medium_10)
-#p = puzzle(master_1)
-#p = puzzle(test_4)
-p = puzzle(medium_36)
 
-print(str(p))
-print()
-p.solve(False)
-print(str(p))
+def main():
+    parser = argparse.ArgumentParser(description='CrossPath solver')
+    parser.add_argument('files', nargs='*', help='puzzle files (.txt or .jsonl), - for stdin, default is samples.txt')
+    parser.add_argument('-s', '--solver', choices=list(solvers), default='search', help='solving method, default is search, count checks uniqueness')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes, default is all cores, 1 to solve in-process')
+    parser.add_argument('--jsonl', action='store_true', help='output results as JSON lines')
+    parser.add_argument('--cache', metavar='FILE', help='sqlite file caching results, puzzles already solved in any rotation or mirror image are not solved again')
+    args = parser.parse_args()
+
+    paths = args.files or [samplesFile]
+    puzzles = (item for path in paths for item in ReadPuzzles(path))
+    cache = SolutionCache(args.cache) if args.cache else None
+    for res in SolveStream(puzzles, args.solver, args.jobs, cache=cache):
+        if args.jsonl:
+            print(json.dumps(res), flush=True)
+            continue
+        if 'error' in res:
+            print('[%s] Invalid puzzle: %s' % (res['name'], res['error']))
+        else:
+            if 'solutions' in res:
+                status = ('No solution', 'Unique solution', 'Several solutions')[res['solutions']]
+            else:
+                # Rules only solvers stop when no rule applies, that doesn't mean there's no solution
+                status = 'Solved' if res['solved'] else 'Unsolved (rules stuck)' if args.solver in ('rules', 'numpy') else 'No solution'
+            print('[%s] %s - nodes: %d - time: %.3f ms%s' % (res['name'], status, res['nodes'], res['time']*1000, ' (cached)' if res.get('cached') else ''))
+            print(Render(res['solution']))
+        print(flush=True)
+
+    if cache:
+        cache.Close()
+        print('Cache: %(hits)d hits, %(misses)d misses' % cache.Stats(), file=sys.stderr if args.jsonl else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# batch.py - Solve a stream of CrossPath puzzles on all cores
+# 2026-10-18    PV
+
+"""
+Puzzles are sent to a process pool by chunks, and results come back in input order.
+Only a bounded window of chunks is in flight, so neither the input nor the results of the
+whole batch are held in memory: results are yielded as soon as the oldest chunk is done.
+With a SolutionCache, puzzles are looked up in main process, and only misses are solved.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from puzzle import puzzle
+import vectorized
+from solutioncache import CachedResult
+
+# Solving methods, by name.  count only checks uniqueness
+solvers = {
+    'rules': puzzle.solve,
+    'search': puzzle.Search,
+    'dlx': puzzle.SolveExactCover,
+    'count': puzzle.CountSolutions,
+}
+# Rules computed by whole grid sweeps, when NumPy is installed
+if vectorized.available:
+    solvers['numpy'] = vectorized.SolveRules
+
+
+def SolveOne(name, grid, solver='search'):
+    """Solve a puzzle, returns a dict with name, solved, solution rows, nodes and time (s).
+    For count solver, solutions is the number of solutions (up to 2) and solution the first one found"""
+    t0 = time.perf_counter()
+    try:
+        p = puzzle(grid)
+        res = solvers[solver](p)
+    except (AssertionError, KeyError, IndexError) as e:
+        # Invalid puzzle definition
+        return {'name': name, 'solved': False, 'error': repr(e), 'time': time.perf_counter()-t0}
+    if solver=='count':
+        return {'name': name, 'solved': res>0, 'solutions': res, 'solution': p.solutions[0] if p.solutions else p.Rows(), 'nodes': p.nodes, 'time': time.perf_counter()-t0}
+    return {'name': name, 'solved': res, 'solution': p.Rows(), 'nodes': getattr(p, 'nodes', 0), 'time': time.perf_counter()-t0}
+
+def CallChunk(function, chunk, args):
+    return [function(item, *args) for item in chunk]
+
+def SolveItem(item, solver):
+    (name, grid) = item
+    return SolveOne(name, grid, solver)
+
+def SolveMiss(item, solver):
+    """SolveItem for a cache miss, None for a hit (grid is None)"""
+    (name, grid) = item
+    return SolveOne(name, grid, solver) if grid is not None else None
+
+def Chunks(puzzles, size):
+    chunk = []
+    for item in puzzles:
+        chunk.append(item)
+        if len(chunk)>=size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def OrderedMap(function, items, args=(), jobs=None, chunk=8, window=None):
+    """Generator of function(item, *args) for each item, computed on a process pool, in input order.
+    function must be a module-level function so that it can be sent to worker processes"""
+    if jobs==1:
+        for item in items:
+            yield function(item, *args)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    window = window or 4*jobs
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = deque()
+        for c in Chunks(items, chunk):
+            pending.append(pool.submit(CallChunk, function, c, args))
+            while len(pending)>=window or (pending and pending[0].done()):
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def SolveStream(puzzles, solver='search', jobs=None, chunk=8, window=None, cache=None):
+    """Generator of SolveOne results for iterable of (name, grid) puzzles, in input order.  With cache, a
+    SolutionCache, results of puzzles already solved come from cache (with cached True), and new ones are stored"""
+    if cache is None:
+        return OrderedMap(SolveItem, puzzles, (solver,), jobs, chunk, window)
+    return CachedSolveStream(puzzles, solver, jobs, chunk, window, cache)
+
+def CachedSolveStream(puzzles, solver, jobs, chunk, window, cache):
+    # Lookups of puzzles sent to pool, in order: (key, transform, cached result or None)
+    lookups = deque()
+
+    def Items():
+        for (name, grid) in puzzles:
+            t0 = time.perf_counter()
+            (key, transform, result) = cache.Lookup(grid, solver)
+            lookups.append((key, transform, CachedResult(name, result, t0) if result else None))
+            yield (name, None if result else grid)
+
+    for res in OrderedMap(SolveMiss, Items(), (solver,), jobs, chunk, window):
+        (key, transform, cached) = lookups.popleft()
+        if cached:
+            yield cached
+            continue
+        if 'error' not in res:
+            cache.Store(key, transform, solver, res)
+        yield res
@@ -0,0 +1,183 @@
+# benchmark.py - Performance measures of CrossPath solvers
+# 2026-10-18    PV
+
+"""
+Corpus is made of sample puzzles, plus grids generated with fixed seeds from 7x7 to 100x100
+(not checked for uniqueness, Search finds one solution).  For each puzzle and solver:
+- time: best wall time of repeated runs, including puzzle construction (index build)
+- deductions, ray scans (the work of former GetExtensionsToCell and ExploreExt calls), search nodes,
+  counts and time per rule
+Deduction rules used can be restricted with --rules, to see how much search each one saves, and
+--no-backjump measures search without component backjumping.
+- peak memory allocated during a separate run under tracemalloc, since tracing slows execution
+With --max-time, each puzzle is measured in a child process, stopped after this time and recorded
+as a timeout, so that a slow solver doesn't hang the suite.
+Results are written to a JSON file, and can be compared to a previous results file to show
+regressions.
+"""
+
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+import subprocess
+import multiprocessing
+
+from puzzle import puzzle, ruleTable
+from puzzlefile import ReadPuzzles, samplesFile
+from generator import RandomGrid
+from batch import solvers
+
+sizes = [7, 11, 15, 20, 30, 50, 75, 100]
+
+
+def Corpus(sizes=sizes, seeds=3):
+    """Generator of (name, grid)"""
+    yield from ReadPuzzles(samplesFile)
+    for n in sizes:
+        for s in range(seeds):
+            yield ('bench_%dx%d_%d' % (n, n, s+1), RandomGrid(n, n, random.Random('bench-%d-%d' % (n, s))))
+
+def Measure(name, grid, solver, repeat=3, ruleNames=None, backjump=True):
+    solve = solvers[solver]
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        p = puzzle(grid, ruleNames, backjump)
+        res = solve(p)
+        t = time.perf_counter()-t0
+        if best is None or t<best:
+            best = t
+
+    tracemalloc.start()
+    q = puzzle(grid, ruleNames, backjump)
+    solve(q)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    r = {'name': name, 'rows': p.rows, 'columns': p.columns, 'solver': solver, 'solved': res if solver!='count' else res>0,
+         'time': best, 'nodes': getattr(p, 'nodes', 0), 'peakMemory': peak}
+    r.update(p.Counters())
+    return r
+
+def MeasureChild(sender, *args):
+    sender.send(Measure(*args))
+
+def MeasureLimited(maxTime, name, grid, solver, *args):
+    """Measure() in a child process, stopped after maxTime seconds (all runs included), the result is then a
+    timeout record"""
+    (receiver, sender) = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target=MeasureChild, args=(sender, name, grid, solver)+args)
+    process.start()
+    sender.close()
+    r = receiver.recv() if receiver.poll(maxTime) else None
+    if r is None:
+        process.terminate()
+        r = {'name': name, 'rows': len(grid), 'columns': len(grid[0]), 'solver': solver, 'solved': False,
+             'timeout': True, 'time': maxTime}
+    process.join()
+    return r
+
+def CheckRules(corpus):
+    """Run Search() with each deduction rule alone, and with none, on corpus puzzles: each rule must be safe without
+    the others, and result must match the one with all rules.  Returns count of failures"""
+    failures = 0
+    for (name, grid) in corpus:
+        expected = puzzle(grid).Search()
+        for ruleNames in [[]]+[[n] for n in ruleTable]:
+            try:
+                p = puzzle(grid, ruleNames)
+                res = p.Search()
+                error = None if res==expected else 'solved %s, expected %s' % (res, expected)
+                if res and error is None and not (p.IsSolved() and all(v==0 or v>9 for v in p.g)):
+                    error = 'solution has free cells or unused counts'
+            except Exception as e:
+                error = '%s: %s' % (type(e).__name__, e)
+            if error:
+                failures += 1
+                print('%-18s %-18s %s' % (name, ','.join(ruleNames) or '(none)', error), flush=True)
+    return failures
+
+def GitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def Compare(results, baselineFile, threshold):
+    """Print time ratio against a previous results file, returns count of regressions"""
+    with open(baselineFile, encoding='utf-8') as f:
+        baseline = {(r['name'], r['solver']): r for r in json.load(f)['results']}
+    regressions = 0
+    print()
+    print('%-18s %-7s %10s %10s %7s' % ('Puzzle', 'Solver', 'Base ms', 'Now ms', 'Ratio'))
+    for r in results:
+        b = baseline.get((r['name'], r['solver']))
+        if b is None:
+            continue
+        if r.get('timeout') or b.get('timeout'):
+            # No ratio, a new timeout is a regression
+            flag = '  <-- regression' if not b.get('timeout') else ''
+            regressions += bool(flag)
+            print('%-18s %-7s %10s %10s %7s%s' % (r['name'], r['solver'], 'timeout' if b.get('timeout') else '%.3f' % (b['time']*1000),
+                                                 'timeout' if r.get('timeout') else '%.3f' % (r['time']*1000), '', flag))
+            continue
+        ratio = r['time']/b['time'] if b['time'] else 0.0
+        flag = ''
+        if ratio>1+threshold:
+            flag = '  <-- regression'
+            regressions += 1
+        print('%-18s %-7s %10.3f %10.3f %7.2f%s' % (r['name'], r['solver'], b['time']*1000, r['time']*1000, ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CrossPath solvers benchmark')
+    parser.add_argument('-s', '--solver', action='append', choices=list(solvers), help='solver to measure, can be repeated, default is search')
+    parser.add_argument('--sizes', type=lambda s: [int(n) for n in s.split(',')], default=sizes, help='comma-separated sizes of generated grids, default is %s' % ','.join(map(str, sizes)))
+    parser.add_argument('--seeds', type=int, default=3, help='generated grids per size, default is 3')
+    parser.add_argument('--rules', type=lambda s: [n for n in s.split(',') if n], help='comma-separated deduction rules to use, default is all: %s' % ','.join(ruleTable))
+    parser.add_argument('--no-backjump', action='store_true', help='plain depth first search, without component backjumping')
+    parser.add_argument('--max-time', type=float, help='time limit in seconds for the runs of a puzzle with a solver, recorded as a timeout when reached')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per puzzle, best is kept, default is 3')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='results file, default is benchmark.json')
+    parser.add_argument('--compare', metavar='FILE', help='previous results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='time increase reported as a regression, default is 0.2 (20%%)')
+    parser.add_argument('--check-rules', action='store_true', help='only check that Search() works with each deduction rule alone, use small --sizes such as 7,11 since search is much longer with a single rule')
+    args = parser.parse_args()
+    if args.rules is not None and 'numpy' in (args.solver or []):
+        parser.error('numpy solver always applies all rules, it can\'t be used with --rules')
+
+    if args.check_rules:
+        failures = CheckRules(Corpus(args.sizes, args.seeds))
+        print('%d failure(s)' % failures)
+        sys.exit(1 if failures else 0)
+
+    results = []
+    print('%-18s %-7s %6s %10s %7s %10s %9s %9s' % ('Puzzle', 'Solver', 'Solved', 'Time ms', 'Nodes', 'Deductions', 'Ray scans', 'Peak KB'))
+    for (name, grid) in Corpus(args.sizes, args.seeds):
+        for solver in args.solver or ['search']:
+            if args.max_time:
+                r = MeasureLimited(args.max_time, name, grid, solver, args.repeat, args.rules, not args.no_backjump)
+            else:
+                r = Measure(name, grid, solver, args.repeat, args.rules, not args.no_backjump)
+            results.append(r)
+            if r.get('timeout'):
+                print('%-18s %-7s %6s %10s' % (name, solver, 'False', 'timeout'), flush=True)
+                continue
+            print('%-18s %-7s %6s %10.3f %7d %10d %9d %9.1f' % (name, solver, r['solved'], r['time']*1000, r['nodes'], r['deductions'], r['rayScans'], r['peakMemory']/1024), flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': GitCommit(), 'python': platform.python_version(),
+                   'platform': platform.platform(), 'results': results}, f, indent=1)
+
+    if args.compare:
+        if Compare(results, args.compare, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
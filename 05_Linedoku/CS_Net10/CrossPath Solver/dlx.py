@@ -0,0 +1,224 @@
+# dlx.py - Exact cover problem solved with Knuth's Algorithm X, using Dancing Links
+# Nodes are stored in parallel lists of ints (L, R, U, D, C) rather than objects
+# 2026-10-18    PV
+
+"""
+Node 0 is the root, nodes 1..columns are column headers, followed by row nodes.
+Solve() is iterative, so depth is not limited by Python recursion limit.
+SolveFirst() only looks for one solution, and splits the remaining matrix in independent components
+at each node (recursive, depth is the count of rows of a solution of a component).
+"""
+
+class ExactCover(object):
+    """Exact cover matrix, rows are added as lists of column numbers (0-based)"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        n = columns+1
+        self.L = [i-1 for i in range(n)]
+        self.L[0] = columns
+        self.R = [i+1 for i in range(n)]
+        self.R[columns] = 0
+        self.U = list(range(n))
+        self.D = list(range(n))
+        self.C = list(range(n))
+        self.S = [0]*n          # Count of nodes in each column
+        self.rowOf = [-1]*n     # Row id of each node
+        self.nodes = 0          # Search nodes visited by last Solve()
+        self.aborted = False    # Last SolveFirst() stopped by its nodes budget
+        self.table = None       # Results of components during SolveFirst(), see there
+
+    def AddRow(self, columns, rowId):
+        first = None
+        for col in columns:
+            c = col+1
+            x = len(self.C)
+            self.C.append(c)
+            self.rowOf.append(rowId)
+            # Insert at the bottom of column c
+            self.U.append(self.U[c])
+            self.D.append(c)
+            self.D[self.U[c]] = x
+            self.U[c] = x
+            self.S[c] += 1
+            # Insert at the end of the row
+            if first is None:
+                first = x
+                self.L.append(x)
+                self.R.append(x)
+            else:
+                self.L.append(self.L[first])
+                self.R.append(first)
+                self.R[self.L[first]] = x
+                self.L[first] = x
+
+    def Cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i!=c:
+            j = R[i]
+            while j!=i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def Uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i!=c:
+            j = L[i]
+            while j!=i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def ChooseColumn(self):
+        """Column with fewest remaining rows"""
+        R, S = self.R, self.S
+        best = R[0]
+        c = R[best]
+        while c!=0 and S[best]>1:
+            if S[c]<S[best]:
+                best = c
+            c = R[c]
+        return best
+
+    def Components(self, columns):
+        """Partition of set columns (headers of uncovered columns) in sets connected through remaining rows"""
+        D, R, C = self.D, self.R, self.C
+        parts = []
+        todo = set(columns)
+        while todo:
+            c = todo.pop()
+            part = {c}
+            stack = [c]
+            while stack:
+                c = stack.pop()
+                i = D[c]
+                while i!=c:
+                    j = R[i]
+                    while j!=i:
+                        if C[j] in todo:
+                            todo.discard(C[j])
+                            part.add(C[j])
+                            stack.append(C[j])
+                        j = R[j]
+                    i = D[i]
+            parts.append(part)
+        return parts
+
+    def SolveFirst(self, maxNodes=None):
+        """First solution as a list of row ids, or None.  At each node, uncovered columns are split into independent
+        components, each solved on its own, so a component without solution doesn't backtrack over choices made in
+        other ones.  With maxNodes, stops after this count of search nodes, returning None with aborted set.
+        Rows left in a component are the rows with all their columns in it, so the result of a component only depends
+        on its columns, and is kept in a table to be reused when the same component comes again"""
+        self.nodes = 0
+        self.aborted = False
+        self.table = {}
+        c = self.R[0]
+        columns = set()
+        while c!=0:
+            columns.add(c)
+            c = self.R[c]
+        solution = []
+        for part in self.Components(columns):
+            rows = self.SolveComponent(part, maxNodes)
+            if rows is None:
+                return None
+            solution.extend(rows)
+        self.table = None
+        return solution
+
+    def SolveComponent(self, columns, maxNodes):
+        """Rows covering exactly set columns, a component of uncovered columns, or None.  Matrix is restored on return.
+        Recursive, depth is the number of rows of the solution of the component"""
+        key = frozenset(columns)
+        if key in self.table:
+            return self.table[key]
+        if maxNodes is not None and self.nodes>=maxNodes:
+            self.aborted = True
+            return None
+        self.nodes += 1
+        R, L, D, C, S = self.R, self.L, self.D, self.C, self.S
+        c = min(columns, key=S.__getitem__)
+        if S[c]==0:
+            return None
+        self.Cover(c)
+        r = D[c]
+        while r!=c and not self.aborted:
+            rest = set(columns)
+            rest.discard(c)
+            j = R[r]
+            while j!=r:
+                self.Cover(C[j])
+                rest.discard(C[j])
+                j = R[j]
+            solution = [self.rowOf[r]]
+            # Smallest components first, they are the most likely to fail
+            for part in sorted(self.Components(rest), key=len):
+                rows = self.SolveComponent(part, maxNodes)
+                if rows is None:
+                    solution = None
+                    break
+                solution.extend(rows)
+            j = L[r]
+            while j!=r:
+                self.Uncover(C[j])
+                j = L[j]
+            if solution is not None:
+                self.Uncover(c)
+                self.table[key] = solution
+                return solution
+            r = D[r]
+        self.Uncover(c)
+        if not self.aborted:
+            self.table[key] = None
+        return None
+
+    def Solve(self):
+        """Generator of solutions, each one a list of row ids"""
+        R, L, D, C = self.R, self.L, self.D, self.C
+        self.nodes = 0
+        chosen = []         # Nodes of the rows currently selected
+        r = None            # Next row node to try at current level, None to go deeper
+        while True:
+            if r is None:
+                self.nodes += 1
+                if R[0]==0:
+                    yield [self.rowOf[x] for x in chosen]
+                    r = 0
+                else:
+                    c = self.ChooseColumn()
+                    self.Cover(c)
+                    r = D[c]
+
+            if r is not None and r!=0 and r!=C[r]:
+                # Select row r and go one level deeper
+                chosen.append(r)
+                j = R[r]
+                while j!=r:
+                    self.Cover(C[j])
+                    j = R[j]
+                r = None
+                continue
+
+            # Column exhausted (r is its header) or solution found (r is 0): backtrack
+            if r!=0:
+                self.Uncover(r)
+            if not chosen:
+                return
+            x = chosen.pop()
+            j = L[x]
+            while j!=x:
+                self.Uncover(C[j])
+                j = L[j]
+            r = D[x]
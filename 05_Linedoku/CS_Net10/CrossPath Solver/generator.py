@@ -0,0 +1,111 @@
+# generator.py - Generate random CrossPath puzzles with a unique solution
+# 2026-10-18    PV
+
+"""
+A random solution is built first: some cells are blocked, then each cell not yet covered
+becomes a center that grows extensions in random directions over uncovered cells.  A center
+that can't grow at all becomes a blocked cell.  Removing extensions gives the puzzle, so the
+count of free cells always equals the total of centers.
+
+Each candidate is then checked:
+- rules difficulty: solved by forced moves only, which also proves that solution is unique
+- search difficulty: needs backtracking, uniqueness checked with CountSolutions(2)
+Candidates are generated on a process pool, each task looping until it finds an accepted
+puzzle, and results are written in task order in puzzlefile formats.
+"""
+
+import sys
+import random
+import argparse
+
+from puzzle import puzzle, directions
+from puzzlefile import WriteTextPuzzle, WriteJsonPuzzle
+from batch import OrderedMap
+
+
+def RandomGrid(rows, columns, rnd, blockRate=0.1, maxCount=9):
+    """Random puzzle grid (list of strings), built from a random solution"""
+    grid = [['X' if rnd.random()<blockRate else '.' for c in range(columns)] for r in range(rows)]
+    covered = [[ch=='X' for ch in row] for row in grid]
+    cells = [(r, c) for r in range(rows) for c in range(columns) if not covered[r][c]]
+    rnd.shuffle(cells)
+    for (r, c) in cells:
+        if covered[r][c]:
+            continue
+        covered[r][c] = True
+        target = rnd.randint(1, maxCount)
+        # Current extent of the center in each direction
+        ends = [(r, c)]*4
+        count = 0
+        while count<target:
+            l = []
+            for d, (rDelta, cDelta) in enumerate(directions):
+                (r1, c1) = (ends[d][0]+rDelta, ends[d][1]+cDelta)
+                if r1>=0 and r1<rows and c1>=0 and c1<columns and not covered[r1][c1]:
+                    l.append((d, r1, c1))
+            if not l:
+                break
+            (d, r1, c1) = rnd.choice(l)
+            covered[r1][c1] = True
+            ends[d] = (r1, c1)
+            count += 1
+        grid[r][c] = str(count) if count>0 else 'X'
+    return [''.join(row) for row in grid]
+
+def Classify(grid):
+    """Returns (difficulty, nodes): rules, search, or None if puzzle has no unique solution"""
+    p = puzzle(grid)
+    if p.solve():
+        return ('rules', 0)
+    # Counting continues from the grid left by rules, which has the same solutions
+    if p.CountSolutions(2)==1:
+        return ('search', p.nodes)
+    return (None, p.nodes)
+
+def GeneratePuzzle(task, rows, columns, seed, difficulty='any', unique=True, blockRate=0.1, maxCount=9):
+    """Generate candidates until one is accepted.  Returns (name, grid, difficulty, nodes, candidates tried)"""
+    rnd = random.Random('%s-%dx%d-%d' % (seed, rows, columns, task))
+    candidates = 0
+    while True:
+        candidates += 1
+        grid = RandomGrid(rows, columns, rnd, blockRate, maxCount)
+        if not unique:
+            return ('gen_%dx%d_%d' % (rows, columns, task+1), grid, None, 0, candidates)
+        (level, nodes) = Classify(grid)
+        if level and (difficulty=='any' or difficulty==level):
+            return ('gen_%dx%d_%d' % (rows, columns, task+1), grid, level, nodes, candidates)
+
+def GenerateStream(count, rows, columns, seed=0, difficulty='any', unique=True, blockRate=0.1, maxCount=9, jobs=None):
+    """Generator of GeneratePuzzle results for tasks 0..count-1, in order"""
+    return OrderedMap(GeneratePuzzle, range(count), (rows, columns, seed, difficulty, unique, blockRate, maxCount), jobs, chunk=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CrossPath puzzles generator')
+    parser.add_argument('size', help='grid size, rowsxcolumns such as 11x11, or a single number for a square grid')
+    parser.add_argument('-n', '--count', type=int, default=1, help='number of puzzles, default is 1')
+    parser.add_argument('-d', '--difficulty', choices=['any', 'rules', 'search'], default='any', help='rules: solved with forced moves only, search: needs backtracking')
+    parser.add_argument('--any-solutions', action='store_true', help="don't check uniqueness (much faster on large grids)")
+    parser.add_argument('-b', '--blocks', type=float, default=0.1, help='rate of blocked cells, default is 0.1')
+    parser.add_argument('-m', '--max-count', type=int, choices=range(1, 10), default=9, help='maximum center value, default is 9')
+    parser.add_argument('--seed', default=0, help='random seed, default is 0')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes, default is all cores')
+    parser.add_argument('--jsonl', action='store_true', help='output as JSON lines instead of text format')
+    args = parser.parse_args()
+
+    (rows, _, columns) = args.size.lower().partition('x')
+    rows = int(rows)
+    columns = int(columns) if columns else rows
+
+    for (name, grid, level, nodes, candidates) in GenerateStream(args.count, rows, columns, args.seed, args.difficulty,
+                                                                 not args.any_solutions, args.blocks, args.max_count, args.jobs):
+        if args.jsonl:
+            WriteJsonPuzzle(sys.stdout, name, grid, difficulty=level, nodes=nodes, candidates=candidates)
+        else:
+            sys.stdout.write('# difficulty: %s, search nodes: %d, candidates: %d\n' % (level, nodes, candidates))
+            WriteTextPuzzle(sys.stdout, name, grid)
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,21 @@
 # puzzle.py - Class to handle a CrossPath puzzle and its resolution
-# Internally puzzle is handled as a list of list of characters in p
+# Internally puzzle is handled as a flat bytearray of cell codes in g, with free cells bitmasks per row and column
 # 2017-09-14    PV
+# 2026-10-18    PV      Incremental candidate index and dirty worklist in solve()
+# 2026-10-18    PV      Compact bytearray grid and per-line bitmasks instead of list of lists of characters
+# 2026-10-18    PV      Backtracking Search() with undo trail when deduction rules are not enough
+# 2026-10-18    PV      SolveExactCover(), alternative solver using Dancing Links
+# 2026-10-18    PV      CountSolutions() for uniqueness check, with Zobrist hashed transposition table
+# 2026-10-18    PV      Backjumping over independent components in search; work counters for benchmarks
+# 2026-10-18    PV      Trace of compact events with per-rule counters and timing instead of printing grid in showSteps
+# 2026-10-18    PV      Only rays of nearest centers of changed cells are refreshed, using sorted centers per line
+# 2026-10-18    PV      Pluggable deduction rules (ruleTable), new capacity and must-pass rules
+# 2026-10-18    PV      SearchSteps() generator, with checkpoints to resume search in another process, and budgets
+# 2026-10-18    PV      Component backjumping can be disabled (backjump=False) to measure it or bisect search changes
 
 """
 Cell values:
-1-9	Extension center 
+1-9	Extension center
 0	Exhausted extension center
 .	Free
 N	North extension (up)
@@ -16,101 +27,346 @@ X	Blocked cell
 Stratégie
 - Tant qu'il existe des cellules joignables par une seule extension, mettre en oeuvre cette extension
 - S'il existe des cellules extensibles d'une seule manière, mettre en oeuvre cette extension
+
+Grid representation
+- g[r*columns+c] is the cell code: 0-9 for a center and its remaining count, then FREE, N, S, W, E, X
+- rowFree[r] has bit c set if cell (r,c) is free, colFree[c] has bit r set if cell (r,c) is free
+- extMask[d][line] has the same layout for cells filled with extension of direction d
+  (rows for W/E, columns for N/S), so a ray is found with a few bit operations
+
+Incremental index
+- rays[i*4+d]: bitmask (along the line) of free cells the center at index i can reach in direction d
+- reach[i]: set of rays reaching free cell at index i
+Placing an extension only refreshes the rows and columns it touched, and cells or centers whose
+candidates changed are queued in a worklist, so solve() never rescans the whole grid.
+
+Search
+When rules are stuck, Search() branches on the center with the fewest direction splits (counts
+N+S+W+E using exactly its remaining count), propagating rules at each node. Cell changes are
+recorded on a trail, and backtracking undoes them instead of copying the grid.
+Each frame keeps the component (centers and free cells connected through rays) of its center.
+Branching stays in that component while it has active centers, and when a component has no
+solution, frames whose component was independent of it are skipped (backjump) instead of
+trying all their alternatives.  With backjump=False, branching uses the whole grid and failed
+frames are only backtracked one at a time, as plain depth first search.
+
+Exact cover
+SolveExactCover() builds a matrix with a column per free cell and per center with a remaining
+count, and a row per (center, split), covering the center and the cells of the split.  Rows
+reaching the same cell exclude each other, so a cover is a solution.  Solved with dlx.py, the
+remaining matrix being split at each node in components (columns connected through rows), so a
+failure in a component doesn't backtrack over choices made in independent ones.
+
+Solutions counting
+hash is the Zobrist hash (xor of a random key per cell and cell code) of the residual grid,
+where an exhausted center and its extensions count as blocked cells X, since nothing can use
+them anymore.  It is updated on each cell change.  CountSolutions() stores the number of
+solutions of each fully explored node in a transposition table, so a residual grid reached
+again by another combination of moves (same cells covered by different centers) is not
+explored twice.
 """
 
+import time
+import random
+from bisect import bisect
+from collections import deque
+
+from dlx import ExactCover
+
+# Cell codes, centers use codes 0-9
+FREE, N, S, W, E, X = 10, 11, 12, 13, 14, 15
+cellChars = '0123456789.NSWEX'
+codeOf = {ch: code for code, ch in enumerate(cellChars)}
+
+# Directions, in index order d: N, S, W, E.  Extension code of direction d is N+d
+directions = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Extension letter for each direction
+extensionOf = {(-1, 0): 'N', (1, 0): 'S', (0, -1): 'W', (0, 1): 'E'}
+
+# Pretty output for str()
+dicmap = { 'N':'▲', 'S':'▼', 'E':'►', 'W':'◄', '.':'·', 'X':'▒', '0':'◌'}
+dicmap.update({str(n):str(n) for n in range(1, 10)})
+
+
+def Render(rows):
+    """Pretty output of a grid given as a list of strings"""
+    return '\r\n'.join(' '.join(dicmap[ch] for ch in row) for row in rows)
+
+
+# Trace events are tuples (rule, source, direction, n), source being a cell index (r*columns+c):
+# - SINGLE_RAY: free cell reached by only one ray, center source extended in direction up to it with n cells
+# - SINGLE_DIRECTION: center source has only one direction left, extended with its n remaining cells
+# - CAPACITY: center source can reach exactly as many free cells as its count, extended with all of them,
+#   one direction per event
+# - MUST_PASS: other directions of center source can't take all its count, extended in direction with the n
+#   cells left over
+# - BRANCH: search choice, center source extended in direction with n cells
+# - UNREACHABLE: contradiction, free cell source can't be reached anymore (direction -1, n 0)
+# - SHORTAGE: contradiction, center source has not enough free cells left (direction -1, n 0), also recorded as
+#   MUST_PASS when rules are used without SHORTAGE
+# - BACKTRACK: search goes back to the state after the n first events of trace (source and direction -1)
+# - NODE: search node number n reached, only yielded by SearchSteps(), not recorded in trace (source and direction -1)
+SINGLE_RAY = 'single-ray'
+SINGLE_DIRECTION = 'single-direction'
+CAPACITY = 'capacity'
+MUST_PASS = 'must-pass'
+BRANCH = 'branch'
+UNREACHABLE = 'unreachable'
+SHORTAGE = 'shortage'
+BACKTRACK = 'backtrack'
+NODE = 'node'
+rules = (SINGLE_RAY, SINGLE_DIRECTION, CAPACITY, MUST_PASS, BRANCH, UNREACHABLE, SHORTAGE, BACKTRACK)
+
+def FormatEvent(event, columns):
+    """Readable description of a trace event"""
+    (rule, source, d, n) = event
+    if rule==BACKTRACK:
+        return 'backtrack to event %d' % n
+    if d<0:
+        return '%s %s' % (rule, divmod(source, columns))
+    return '%s %s %s %d' % (rule, divmod(source, columns), 'NSWE'[d], n)
+
+def Replay(ts, trace):
+    """Generator of (event, rows) replaying trace from grid ts (the grid when tracing started)"""
+    p = puzzle(ts)
+    p.trail = []
+    marks = [0]     # Trail length after each event
+    for event in trace:
+        (rule, source, d, n) = event
+        if rule==BACKTRACK:
+            p.Undo(marks[n])
+        elif d>=0:
+            (r, c) = divmod(source, p.columns)
+            p.Extend(r, c, directions[d][0], directions[d][1], n)
+        marks.append(len(p.trail))
+        yield (event, p.Rows())
+
+
+# Zobrist keys, per grid size, 16 codes per cell
+zobristKeys = {}
+
+def ZobristKeys(size):
+    if size not in zobristKeys:
+        rnd = random.Random(size)
+        zobristKeys[size] = [rnd.getrandbits(64) for _ in range(16*size)]
+    return zobristKeys[size]
+
+
+def LowBits(mask, n):
+    """n lowest set bits of mask"""
+    res = 0
+    for _ in range(n):
+        b = mask & -mask
+        res |= b
+        mask ^= b
+    return res
+
+def HighBits(mask, n):
+    """n highest set bits of mask"""
+    res = 0
+    for _ in range(n):
+        b = 1 << (mask.bit_length()-1)
+        res |= b
+        mask ^= b
+    return res
+
+def BitPositions(mask):
+    """Positions of set bits of mask, lowest first"""
+    while mask:
+        b = mask & -mask
+        yield b.bit_length()-1
+        mask ^= b
+
+
 class puzzle(object):
     """description of class"""
 
-    def __init__(self, ts):
-        self.p = [list(s) for s in ts]
+    def __init__(self, ts, ruleNames=None, backjump=True):
+        """Puzzle from grid ts (list of strings).  ruleNames is the list of names of deduction rules of ruleTable
+        to use, in order, default is all.  backjump enables component restricted branching and backjumping in search"""
         self.rows = len(ts)
         self.columns = len(ts[0])
+        self.g = bytearray(codeOf[ch] for s in ts for ch in s)
+        assert len(self.g)==self.rows*self.columns
 
-        # Pretty output for str()
-        self.dicmap = { 'N':'▲', 'S':'▼', 'E':'►', 'W':'◄', '.':'·', 'X':'▒', '0':'◌'}
-        self.dicmap.update({str(n):str(n) for n in range(1, 10)})
+        self.dicmap = dicmap
 
         # Check that count of empty cells equals total of extensions
-        ns = [e for r in self.p for e in r].count(".")
-        te = sum([int(e) if e>="1" and e<="9" else 0 for r in self.p for e in r])
+        ns = self.g.count(FREE)
+        te = sum(v for v in self.g if v<=9)
         assert ns==te
 
+        self.rowFree = [0]*self.rows
+        self.colFree = [0]*self.columns
+        self.extMask = [[0]*self.columns, [0]*self.columns, [0]*self.rows, [0]*self.rows]
+        self.trail = None
+        self.zobrist = ZobristKeys(len(self.g))
+
+        # Work counters
+        self.deductions = 0
+        self.rayScans = 0
+        self.ruleCounts = dict.fromkeys(rules+tuple(ruleTable), 0)
+        self.ruleTime = dict.fromkeys(rules+tuple(ruleTable), 0.0)
+        # List of events when tracing, see Replay()
+        self.trace = None
+        self.rules = list(ruleTable) if ruleNames is None else list(ruleNames)
+        self.freeRules = [(name, ruleTable[name][1]) for name in self.rules if ruleTable[name][0]==FREE]
+        self.centerRules = [(name, ruleTable[name][1]) for name in self.rules if ruleTable[name][0]!=FREE]
+        self.backjump = backjump
+        for i, v in enumerate(self.g):
+            if v>=FREE and v<X:
+                self.SetMasks(i, v, 1)
+        self.hash = self.ResidualHash()
+
+        self.BuildIndex()
+
 
     def __str__(self):
-        return '\r\n'.join(' '.join(self.dicmap[c] for c in l) for l in self.p)
+        return '\r\n'.join(' '.join(self.dicmap[cellChars[v]] for v in self.g[r*self.columns:(r+1)*self.columns]) for r in range(self.rows))
 
     def __repr__(self):
         return self.__str__()
 
+    def Rows(self):
+        """Grid as a list of strings, same format as the one used to define the puzzle"""
+        return [''.join(cellChars[v] for v in self.g[r*self.columns:(r+1)*self.columns]) for r in range(self.rows)]
+
+    def Cell(self, r, c):
+        """Character of cell (r,c), same as in the strings used to define the puzzle"""
+        return cellChars[self.g[r*self.columns+c]]
+
+    def SetMasks(self, i, v, on):
+        r, c = divmod(i, self.columns)
+        if v==FREE:
+            if on:
+                self.rowFree[r] |= 1<<c
+                self.colFree[c] |= 1<<r
+            else:
+                self.rowFree[r] &= ~(1<<c)
+                self.colFree[c] &= ~(1<<r)
+        elif v>=N and v<=E:
+            d = v-N
+            line, bit = (c, r) if d<2 else (r, c)
+            if on:
+                self.extMask[d][line] |= 1<<bit
+            else:
+                self.extMask[d][line] &= ~(1<<bit)
+
+    def SetCell(self, i, v):
+        if self.trail is not None:
+            self.trail.append((i, self.g[i]))
+        self.WriteCell(i, v)
+
+    def WriteCell(self, i, v):
+        """Change cell code, updating masks and hash"""
+        old = self.g[i]
+        z = self.zobrist
+        if old<=9:
+            # Exhausted center and its extensions hash as blocked cells
+            self.hash ^= z[i*16+(old or X)] ^ z[i*16+(v or X)]
+            if (old==0)!=(v==0):
+                for j in self.OwnedCells(i):
+                    self.hash ^= z[j*16+self.g[j]] ^ z[j*16+X]
+        else:
+            self.hash ^= z[i*16+old] ^ z[i*16+v]
+        if old>=FREE and old<X:
+            self.SetMasks(i, old, 0)
+        self.g[i] = v
+        if v>=FREE and v<X:
+            self.SetMasks(i, v, 1)
+
+    def OwnedCells(self, i):
+        """Indexes of cells filled by extensions of center at index i"""
+        (r, c) = divmod(i, self.columns)
+        for d, (rDelta, cDelta) in enumerate(directions):
+            r1, c1 = r+rDelta, c+cDelta
+            while r1>=0 and r1<self.rows and c1>=0 and c1<self.columns and self.g[r1*self.columns+c1]==N+d:
+                yield r1*self.columns+c1
+                r1, c1 = r1+rDelta, c1+cDelta
+
+    def ResidualHash(self):
+        """Zobrist hash of residual grid, computed from scratch"""
+        codes = bytearray(self.g)
+        for i, v in enumerate(self.g):
+            if v==0:
+                codes[i] = X
+                for j in self.OwnedCells(i):
+                    codes[j] = X
+        h = 0
+        for i, v in enumerate(codes):
+            h ^= self.zobrist[i*16+v]
+        return h
+
+    def Counters(self):
+        """Work counters for benchmarks.  Rules find moves through the ray index, so ray scans measure the work
+        formerly done by GetExtensionsToCell/ExploreExt calls, which solvers don't use anymore"""
+        return {'deductions': self.deductions, 'rayScans': self.rayScans,
+                'ruleCounts': dict(self.ruleCounts), 'ruleTime': dict(self.ruleTime)}
+
     def GetExtensionsToCell(self, rTarget, cTarget):
-        assert self.p[rTarget][cTarget]=="."
+        assert self.g[rTarget*self.columns+cTarget]==FREE
         l = []
 
         # search for horizontal extensions
-        for c in range(self.columns):
-            v = self.p[rTarget][c] 
-            if v>="1" and v<="9":
-                vnum = int(v)
-                if c<cTarget:
-                    delta = 1
-                    previousExtension="E"
-                else:
-                    delta = -1
-                    previousExtension="W"
-                c1 = c
-                while vnum>0:
-                    c1 += delta
-                    if c1==cTarget:
-                        l.append((rTarget, c, 0, delta, previousExtension))
-                        break
-                    if c1>=self.columns: break
-                    if self.p[rTarget][c1]!="." and self.p[rTarget][c1]!=previousExtension: break
-                    if self.p[rTarget][c1]==".": vnum -= 1
+        for c in self.rowCenters[rTarget]:
+            if c<cTarget:
+                d = 3
+            else:
+                d = 2
+            if self.ScanRay(rTarget, c, d)>>cTarget & 1:
+                l.append((rTarget, c, 0, directions[d][1], extensionOf[directions[d]]))
 
         # search for vertical extensions
-        for r in range(self.rows):
-            v = self.p[r][cTarget] 
-            if v>="1" and v<="9":
-                vnum = int(v)
-                if r<rTarget:
-                    delta = 1
-                    previousExtension="S"
-                else:
-                    delta = -1
-                    previousExtension="N"
-                r1 = r
-                while vnum>0:
-                    r1 += delta
-                    if r1==rTarget:
-                        l.append((r, cTarget, delta, 0, previousExtension))
-                        break
-                    if r1>=self.rows: break
-                    if self.p[r1][cTarget]!="." and self.p[r1][cTarget]!=previousExtension: break
-                    if self.p[r1][cTarget]==".": vnum -= 1
-            
+        for r in self.colCenters[cTarget]:
+            if r<rTarget:
+                d = 1
+            else:
+                d = 0
+            if self.ScanRay(r, cTarget, d)>>rTarget & 1:
+                l.append((r, cTarget, directions[d][0], 0, extensionOf[directions[d]]))
+
         return l
 
 
+    def ScanRay(self, rSource, cSource, d):
+        """Return the bitmask (bit c for a row, bit r for a column) of free cells the center at (rSource,cSource) can reach in direction d"""
+        self.rayScans += 1
+        vnum = self.g[rSource*self.columns+cSource]
+        if vnum==0:
+            return 0
+        if d<2:
+            free = self.colFree[cSource]
+            passable = free | self.extMask[d][cSource]
+            pos = rSource
+        else:
+            free = self.rowFree[rSource]
+            passable = free | self.extMask[d][rSource]
+            pos = cSource
+
+        if d&1:
+            # Towards higher indexes: count passable cells after pos
+            p = passable >> (pos+1)
+            run = ((p+1) & ~p).bit_length()-1
+            f = free & (((1<<run)-1) << (pos+1))
+            return f if f.bit_count()<=vnum else LowBits(f, vnum)
+        else:
+            # Towards lower indexes: passable cells start after the highest blocker below pos
+            below = (1<<pos)-1
+            start = (~passable & below).bit_length()
+            f = free & below & ~((1<<start)-1)
+            return f if f.bit_count()<=vnum else HighBits(f, vnum)
+
     def ExploreExt(self, rSource, cSource, rDelta, cDelta, extension):
-        vuse = 0
-        vnum = int(self.p[rSource][cSource])
-        r,c = rSource,cSource
-        while vnum>0:
-            r += rDelta
-            c += cDelta
-            if r>=self.rows or r<0 or c>=self.columns or c<0: break
-            if self.p[r][c]!="." and self.p[r][c]!=extension: break
-            if self.p[r][c]==".": 
-                vuse += 1
-                vnum -= 1
+        vuse = self.ScanRay(rSource, cSource, directions.index((rDelta, cDelta))).bit_count()
         if vuse>0:
             return (rDelta, cDelta, extension, vuse)
         else:
             return None
 
     def GetExtensionsFromCell(self, rSource, cSource):
-        v = self.p[rSource][cSource]
-        assert v>="0" and v<="9"
+        v = self.g[rSource*self.columns+cSource]
+        assert v<=9
         l = []
 
         # Look in all 4 directions
@@ -124,67 +380,509 @@ class puzzle(object):
         if ext: l.append(ext)
         return l
 
-    def solve(self, showSteps):
-        doAgain = True
-        while doAgain:
-            doAgain = False
-            for r in range(self.rows):
-                for c in range(self.columns):
-                    if self.p[r][c]==".":
-                        l = self.GetExtensionsToCell(r, c)
-                        if len(l)==1:
-                            # Only one extension possible to cell (r,c): do it
-                            if showSteps:
-                                print("To ", (r, c), ": ", l[0])
-                            rSource = l[0][0]
-                            cSource = l[0][1]
-                            rDelta = l[0][2]
-                            cDelta = l[0][3]
-                            extChar = l[0][4]
-                            v = int(self.p[rSource][cSource])
-                            while True:
-                                rSource += rDelta
-                                cSource += cDelta
-                                if self.p[rSource][cSource]==".":
-                                    self.p[rSource][cSource] = extChar
-                                    v -= 1
-                                if rSource==r and cSource==c:
-                                    rSource = l[0][0]
-                                    cSource = l[0][1]
-                                    self.p[rSource][cSource] = str(v)
-                                    break
-                            if showSteps:
-                                print(str(self))
-                                print()
-                            doAgain = True
-                            break
-
-                    if self.p[r][c]>="1" and self.p[r][c]<="9":
-                        l = self.GetExtensionsFromCell(r, c)
-                        if len(l)==1:
-                            # Only one extension direction possible that exhaust remaining count: do it
-                            if showSteps:
-                                print("From ", (r, c), ": ", l[0])
-                            rDelta = l[0][0]
-                            cDelta = l[0][1]
-                            extChar = l[0][2]
-                            vuse = l[0][3]
-                            assert int(self.p[r][c])==vuse
-                            r1,c1 = r,c
-                            while vuse>0:
-                                r1 += rDelta
-                                c1 += cDelta
-                                if r>=self.rows or r<0 or c>=self.columns or c<0: break
-                                if self.p[r1][c1]!="." and self.p[r1][c1]!=extChar: break
-                                if self.p[r1][c1]==".": 
-                                    vuse -= 1
-                                    self.p[r1][c1] = extChar
-                            assert vuse==0
-                            self.p[r][c] = "0"
-                            if showSteps:
-                                print(str(self))
-                                print()
-                            doAgain = True
-                            break
-
-                if doAgain: break
\ No newline at end of file
+    def BuildIndex(self):
+        self.rowCenters = [[c for c in range(self.columns) if self.g[r*self.columns+c]<=9] for r in range(self.rows)]
+        self.colCenters = [[r for r in range(self.rows) if self.g[r*self.columns+c]<=9] for c in range(self.columns)]
+        self.centers = [i for i, v in enumerate(self.g) if v<=9]
+        self.rays = [0]*(4*len(self.g))
+        self.reach = [set() if v==FREE else None for v in self.g]
+        self.freeCount = self.g.count(FREE)
+        # Initial worklist in scan order, so that first deductions are the same as a full scan
+        self.worklist = deque()
+        self.queued = bytearray(len(self.g))
+        self.EnqueueAll()
+        self.RefreshLines(range(self.rows), range(self.columns))
+
+    def EnqueueAll(self):
+        for i, v in enumerate(self.g):
+            if v!=X:
+                self.Enqueue(i)
+
+    def Enqueue(self, i):
+        if not self.queued[i]:
+            self.queued[i] = 1
+            self.worklist.append(i)
+
+    def RayCell(self, i, d, pos):
+        """Index of the cell at position pos (bit number) on the line of the ray from i in direction d"""
+        return pos*self.columns + i%self.columns if d<2 else i - i%self.columns + pos
+
+    def RefreshRay(self, i, d):
+        r, c = divmod(i, self.columns)
+        key = i*4+d
+        cells = self.ScanRay(r, c, d)
+        old = self.rays[key]
+        if cells==old:
+            return
+        self.rays[key] = cells
+        for pos in BitPositions(old & ~cells):
+            j = self.RayCell(i, d, pos)
+            if self.reach[j] is not None:
+                self.reach[j].discard(key)
+                self.Enqueue(j)
+        for pos in BitPositions(cells & ~old):
+            j = self.RayCell(i, d, pos)
+            self.reach[j].add(key)
+            self.Enqueue(j)
+        self.Enqueue(i)
+
+    def RefreshLines(self, rows, columns):
+        for r in rows:
+            for c in self.rowCenters[r]:
+                self.RefreshRay(r*self.columns+c, 2)
+                self.RefreshRay(r*self.columns+c, 3)
+        for c in columns:
+            for r in self.colCenters[c]:
+                self.RefreshRay(r*self.columns+c, 0)
+                self.RefreshRay(r*self.columns+c, 1)
+
+    def RefreshCells(self, cells):
+        """Refresh rays that can see cells at indexes in cells.  Centers block rays, so a changed free or extension
+        cell is only seen by the nearest center on each side in its row and column, found by bisection in sorted
+        centers of the line.  A changed center (count) only affects its own rays"""
+        keys = set()
+        for j in cells:
+            (r, c) = divmod(j, self.columns)
+            if self.g[j]<=9:
+                keys.update(range(j*4, j*4+4))
+                continue
+            line = self.rowCenters[r]
+            k = bisect(line, c)
+            if k>0:
+                keys.add((r*self.columns+line[k-1])*4+3)
+            if k<len(line):
+                keys.add((r*self.columns+line[k])*4+2)
+            line = self.colCenters[c]
+            k = bisect(line, r)
+            if k>0:
+                keys.add((line[k-1]*self.columns+c)*4+1)
+            if k<len(line):
+                keys.add((line[k]*self.columns+c)*4)
+        for key in keys:
+            self.RefreshRay(key>>2, key&3)
+
+    def RayPositions(self, i, d, n):
+        """Bit positions of the n first cells of ray from i in direction d, nearest first"""
+        mask = self.rays[i*4+d]
+        mask = LowBits(mask, n) if d&1 else HighBits(mask, n)
+        l = list(BitPositions(mask))
+        assert len(l)==n
+        return l if d&1 else l[::-1]
+
+    def Extend(self, rSource, cSource, rDelta, cDelta, n):
+        """Fill the n first free cells reachable by center (rSource,cSource) in direction (rDelta,cDelta), and update index"""
+        i = rSource*self.columns+cSource
+        d = directions.index((rDelta, cDelta))
+        cells = [self.RayCell(i, d, pos) for pos in self.RayPositions(i, d, n)]
+        for j in cells:
+            self.SetCell(j, N+d)
+            self.reach[j] = None
+        self.freeCount -= n
+        self.SetCell(i, self.g[i]-n)
+
+        # Source changed (count), as well as filled cells
+        cells.append(i)
+        self.RefreshCells(cells)
+
+    def IsSolved(self):
+        return self.freeCount==0
+
+    def Apply(self, rule, i, d, n):
+        """Extend center at index i in direction d with n cells as a consequence of rule, and account for it.
+        Time is accounted by callers, Propagate() for deduction rules, including cells where they don't apply"""
+        (r, c) = divmod(i, self.columns)
+        self.Extend(r, c, directions[d][0], directions[d][1], n)
+        self.ruleCounts[rule] += 1
+        if rule!=BRANCH:
+            self.deductions += 1
+        if self.trace is not None:
+            self.trace.append((rule, i, d, n))
+
+    def Contradiction(self, rule, i):
+        self.ruleCounts[rule] += 1
+        if self.trace is not None:
+            self.trace.append((rule, i, -1, 0))
+        return False
+
+    def Propagate(self):
+        """Apply rules to cells of worklist until it's empty.  Returns False if a contradiction is found"""
+        while self.worklist:
+            i = self.worklist.popleft()
+            self.queued[i] = 0
+            v = self.g[i]
+            if v==FREE:
+                l = self.freeRules
+            elif v>=1 and v<=9:
+                l = self.centerRules
+            else:
+                continue
+            for (name, rule) in l:
+                t0 = time.perf_counter()
+                ok = rule(self, i)
+                self.ruleTime[name] += time.perf_counter()-t0
+                if not ok:
+                    return self.Contradiction(name, i)
+                if self.g[i]!=v:
+                    # Cell changed, it has been queued again if there is more to do
+                    break
+        return True
+
+    # Deduction rules, called with the index of a free cell or an active center (count>0), return False for a
+    # contradiction.  A rule applying a move returns just after it, following rules of the cell are skipped
+
+    def RuleUnreachable(self, i):
+        """Free cell must be reachable by at least one ray"""
+        return len(self.reach[i])>0
+
+    def RuleSingleRay(self, i):
+        """Free cell reached by only one ray: extend its center up to this cell"""
+        l = self.reach[i]
+        if len(l)==1:
+            key = next(iter(l))
+            iSource, d = divmod(key, 4)
+            # Number of ray cells from source up to target included
+            (r, c) = divmod(i, self.columns)
+            pos = r if d<2 else c
+            mask = self.rays[key]
+            n = (mask & ((2<<pos)-1) if d&1 else mask>>pos).bit_count()
+            self.Apply(SINGLE_RAY, iSource, d, n)
+        return True
+
+    def RuleShortage(self, i):
+        """Center must reach at least as many free cells as its count"""
+        return sum(self.rays[i*4+d].bit_count() for d in range(4))>=self.g[i]
+
+    def RuleSingleDirection(self, i):
+        """Only one extension direction possible: use remaining count in it"""
+        l = [d for d in range(4) if self.rays[i*4+d]]
+        if len(l)==1:
+            d = l[0]
+            self.Apply(SINGLE_DIRECTION, i, d, self.rays[i*4+d].bit_count())
+        return True
+
+    def RuleCapacity(self, i):
+        """Center reaching exactly as many free cells as its count: all of them are used, one direction at a time"""
+        a = [self.rays[i*4+d].bit_count() for d in range(4)]
+        if sum(a)==self.g[i]:
+            d = next(d for d in range(4) if a[d])
+            self.Apply(CAPACITY, i, d, a[d])
+        return True
+
+    def RuleMustPass(self, i):
+        """Count that other directions can't take must be used in direction d, so its first cells are used
+        whatever the split"""
+        a = [self.rays[i*4+d].bit_count() for d in range(4)]
+        total = sum(a)
+        if total<self.g[i]:
+            # Shortage, checked here too since rules can be used alone
+            return False
+        for d in range(4):
+            need = self.g[i]-(total-a[d])
+            if need>0:
+                self.Apply(MUST_PASS, i, d, need)
+                break
+        return True
+
+    def solve(self, trace=False):
+        """Solve using rules only.  With trace, events are recorded in trace attribute, see Replay()"""
+        if trace:
+            self.trace = []
+        return self.Propagate() and self.IsSolved()
+
+    def Undo(self, mark):
+        """Restore cells recorded on trail after position mark, and rebuild index of rays seeing them"""
+        cells = set()
+        while len(self.trail)>mark:
+            (i, v) = self.trail.pop()
+            self.WriteCell(i, v)
+            if v==FREE:
+                self.reach[i] = set()
+                self.freeCount += 1
+            cells.add(i)
+        # Restored state was a propagation fixpoint, pending work is obsolete
+        while self.worklist:
+            self.queued[self.worklist.pop()] = 0
+        self.RefreshCells(cells)
+
+    def Splits(self, i):
+        """List of (nN, nS, nW, nE) using exactly the remaining count of center at index i"""
+        k = self.g[i]
+        a = [self.rays[i*4+d].bit_count() for d in range(4)]
+        l = []
+        for nN in range(min(a[0], k)+1):
+            for nS in range(min(a[1], k-nN)+1):
+                for nW in range(min(a[2], k-nN-nS)+1):
+                    nE = k-nN-nS-nW
+                    if nE<=a[3]:
+                        l.append((nN, nS, nW, nE))
+        return l
+
+    def Component(self, i):
+        """Set of indexes of centers and free cells connected to center at index i through rays"""
+        comp = {i}
+        todo = [i]
+        while todo:
+            j = todo.pop()
+            if self.g[j]==FREE:
+                l = [key>>2 for key in self.reach[j]]
+            else:
+                l = [self.RayCell(j, d, pos) for d in range(4) for pos in BitPositions(self.rays[j*4+d])]
+            for k in l:
+                if k not in comp:
+                    comp.add(k)
+                    todo.append(k)
+        return comp
+
+    def BranchCenter(self, candidates=None):
+        """Center with fewest splits, and its splits.  Centers searched in candidates indexes if provided and
+        containing an active center, else in the whole grid"""
+        if candidates is not None:
+            candidates = sorted(i for i in candidates if self.g[i]>=1 and self.g[i]<=9)
+        if not candidates:
+            candidates = self.centers
+        best = None
+        for i in candidates:
+            v = self.g[i]
+            if v>=1 and v<=9:
+                l = self.Splits(i)
+                if best is None or len(l)<len(best[1]):
+                    best = (i, l)
+                    if len(l)<=1:
+                        break
+        return best if best else (-1, [])
+
+    def ApplySplit(self, i, split):
+        t0 = time.perf_counter()
+        for d, n in enumerate(split):
+            if n>0:
+                self.Apply(BRANCH, i, d, n)
+        self.ruleTime[BRANCH] += time.perf_counter()-t0
+
+    def DepthFirst(self, limit, table=None):
+        """Depth first search of solutions, stopping after limit solutions.  Returns the count of solutions found,
+        table is an optional transposition table {hash: count of solutions}"""
+        for _ in self.DepthFirstSteps(limit, table):
+            pass
+        return self.count
+
+    def DepthFirstSteps(self, limit, table=None, path=None):
+        """Generator version of DepthFirst, yielding a NODE event at each node, with search state in stack, count and
+        nodes attributes.  path is the list of (index of next split, count before node) of stack frames to restore,
+        see Checkpoint()"""
+        count = self.count
+        self.stack = stack = []
+        # Moves replayed to restore stack are not traced again
+        (trace, self.trace) = (self.trace, None) if path else (self.trace, self.trace)
+        ok = self.Propagate()
+        for (index, countBefore) in path or ():
+            (i, splits) = self.BranchCenter(stack[-1][6] if stack and self.backjump else None)
+            stack.append([len(self.trail), i, splits, index, self.hash, countBefore, self.Component(i) if self.backjump else set(), 0])
+            self.ApplySplit(i, splits[index-1])
+            ok = self.Propagate()
+        self.trace = trace
+        resumed = path is not None
+        while True:
+            if not resumed:
+                self.nodes += 1
+                self.count = count
+                yield (NODE, -1, -1, self.nodes)
+            resumed = False
+            if ok:
+                if self.IsSolved():
+                    count += 1
+                    if self.solutions is not None:
+                        self.solutions.append(self.Rows())
+                    if count>=limit:
+                        break
+                elif table is not None and self.hash in table:
+                    # Grid already explored
+                    self.ttHits += 1
+                    count += table[self.hash]
+                    if count>=limit:
+                        break
+                else:
+                    # Stack frame: trail mark, center, splits, index of next split to try, node hash, count before node,
+                    # component of center, trace length.  Stay in the component of previous frame while it has active centers
+                    (i, splits) = self.BranchCenter(stack[-1][6] if stack and self.backjump else None)
+                    stack.append([len(self.trail), i, splits, 0, self.hash, count, self.Component(i) if i>=0 and self.backjump else set(),
+                                  len(self.trace) if self.trace is not None else 0])
+
+            # Try next split of deepest frame not exhausted
+            while stack:
+                frame = stack[-1]
+                self.Undo(frame[0])
+                if frame[3]>0:
+                    # Back from a split already tried
+                    self.ruleCounts[BACKTRACK] += 1
+                    if self.trace is not None:
+                        self.trace.append((BACKTRACK, -1, -1, frame[7]))
+                if frame[3]<len(frame[2]):
+                    split = frame[2][frame[3]]
+                    frame[3] += 1
+                    self.ApplySplit(frame[1], split)
+                    ok = self.Propagate()
+                    break
+                stack.pop()
+                if table is not None:
+                    table[frame[4]] = count-frame[5]
+                if self.backjump and count==frame[5]:
+                    # No solution in the component of this frame: previous frames whose component didn't contain it
+                    # made independent choices, that can't fix it, so they have no solution either (backjump)
+                    while stack and frame[1] not in stack[-1][6]:
+                        skipped = stack.pop()
+                        self.backjumps += 1
+                        if table is not None:
+                            table[skipped[4]] = 0
+            else:
+                break
+        self.count = count
+
+    def Search(self, trace=False):
+        """Solve using rules, and backtracking when rules are not enough.  Node count and time in nodes and searchTime.
+        With trace, events are recorded in trace attribute, see Replay()"""
+        t0 = time.perf_counter()
+        if trace:
+            self.trace = []
+        self.nodes = 0
+        self.backjumps = 0
+        self.trail = []
+        self.solutions = None
+        self.count = 0
+        solved = self.DepthFirst(1, None)==1
+        self.trail = None
+        self.searchTime = time.perf_counter()-t0
+        return solved
+
+    def CountSolutions(self, limit=2):
+        """Number of solutions, counting stops at limit.  Grid is left unchanged, solutions found are in solutions
+        (a solution counted from transposition table is not listed).  Node count, table hits and time in nodes,
+        ttHits and searchTime"""
+        t0 = time.perf_counter()
+        self.nodes = 0
+        self.ttHits = 0
+        self.backjumps = 0
+        self.trail = []
+        self.solutions = []
+        self.count = 0
+        count = self.DepthFirst(limit, {})
+        self.Undo(0)
+        self.EnqueueAll()
+        self.trail = None
+        self.searchTime = time.perf_counter()-t0
+        return min(count, limit)
+
+    def SearchSteps(self, limit=1, checkpoint=None, deductions=False):
+        """Generator version of Search (limit 1) or CountSolutions (limit>1, without transposition table), yielding
+        a NODE event at each search node, and with deductions, trace events since previous node.  Search can be
+        paused between two nodes, and continued later or from Checkpoint() with Resume().  When the generator
+        is exhausted, done is True, count of solutions found is in count, and solutions in solutions"""
+        self.done = False
+        if checkpoint is None:
+            self.initial = self.Rows()
+            (self.nodes, self.count, self.solutions) = (0, 0, [])
+        else:
+            self.initial = checkpoint['grid']
+            (self.nodes, self.count, self.solutions) = (checkpoint['nodes'], checkpoint['count'], checkpoint['solutions'])
+        self.limit = limit
+        self.backjumps = 0
+        if checkpoint is not None and checkpoint.get('done'):
+            # Search was already complete, nothing to do again
+            self.done = True
+            return
+        self.trail = []
+        steps = self.DepthFirstSteps(limit, None, checkpoint['path'] if checkpoint else None)
+        if deductions:
+            self.trace = []
+            pos = 0
+            for event in steps:
+                yield from self.trace[pos:]
+                pos = len(self.trace)
+                yield event
+            yield from self.trace[pos:]
+        else:
+            yield from steps
+        self.trail = None
+        self.done = True
+
+    def Checkpoint(self):
+        """Compact JSON-serializable state of a search paused by SearchSteps() at a node, or complete (done):
+        initial grid, rules, backjump, limit, counters, solutions found, and for each frame of search stack, the
+        index of next split to try and the count of solutions before the frame.  Splits are computed again on resume"""
+        return {'grid': self.initial, 'rules': self.rules, 'backjump': self.backjump, 'limit': self.limit,
+                'done': self.done, 'nodes': self.nodes, 'count': self.count,
+                'solutions': self.solutions, 'path': [[frame[3], frame[5]] for frame in self.stack]}
+
+    def IsUnique(self):
+        return self.CountSolutions(2)==1
+
+    def SplitCells(self, i, split):
+        """Indexes of cells filled by split of center at index i"""
+        l = []
+        for d, n in enumerate(split):
+            if n>0:
+                l.extend(self.RayCell(i, d, pos) for pos in self.RayPositions(i, d, n))
+        return l
+
+    def SolveExactCover(self, maxNodes=None):
+        """Solve with Algorithm X, splitting the matrix in independent components.  Node count and time in nodes and
+        searchTime.  With maxNodes, search stops after this count of nodes, and puzzle is reported unsolved
+        with aborted set"""
+        t0 = time.perf_counter()
+        self.nodes = 0
+        self.aborted = False
+        solved = False
+        if self.Propagate():
+            # Columns: free cells, then centers with a remaining count
+            column = {}
+            for i, v in enumerate(self.g):
+                if v==FREE:
+                    column[i] = len(column)
+            centers = [i for i, v in enumerate(self.g) if v>=1 and v<=9]
+            for i in centers:
+                column[i] = len(column)
+            matrix = ExactCover(len(column))
+            rows = []
+            for i in centers:
+                for split in self.Splits(i):
+                    matrix.AddRow([column[i]]+[column[j] for j in self.SplitCells(i, split)], len(rows))
+                    rows.append((i, split))
+            solution = matrix.SolveFirst(maxNodes)
+            self.nodes = matrix.nodes
+            self.aborted = matrix.aborted
+            if solution is not None:
+                for rowId in solution:
+                    self.ApplySplit(*rows[rowId])
+                solved = self.IsSolved()
+        self.searchTime = time.perf_counter()-t0
+        return solved
+
+
+# Deduction rules by name, in default order, with kind of cell they apply to (FREE for free cells, else active
+# centers) and function(puzzle, cell index) returning False for a contradiction.  New rules can be added here
+ruleTable = {
+    UNREACHABLE: (FREE, puzzle.RuleUnreachable),
+    SINGLE_RAY: (FREE, puzzle.RuleSingleRay),
+    SHORTAGE: (0, puzzle.RuleShortage),
+    SINGLE_DIRECTION: (0, puzzle.RuleSingleDirection),
+    CAPACITY: (0, puzzle.RuleCapacity),
+    MUST_PASS: (0, puzzle.RuleMustPass),
+}
+
+
+def Resume(checkpoint, deductions=False):
+    """Returns (puzzle, generator) continuing the search saved by puzzle.Checkpoint(), generator is empty if the
+    search was complete"""
+    p = puzzle(checkpoint['grid'], checkpoint['rules'], checkpoint.get('backjump', True))
+    return (p, p.SearchSteps(checkpoint['limit'], checkpoint, deductions))
+
+def RunSteps(steps, maxNodes=None, maxTime=None):
+    """Iterate generator steps of SearchSteps() until it's exhausted (returns True) or until maxNodes nodes or maxTime
+    seconds are spent (returns False), generator is then paused at a node, ready for Checkpoint()"""
+    t0 = time.perf_counter()
+    nodes = 0
+    for event in steps:
+        if event[0]==NODE:
+            nodes += 1
+            if (maxNodes is not None and nodes>=maxNodes) or (maxTime is not None and time.perf_counter()-t0>=maxTime):
+                return False
+    return True
@@ -0,0 +1,98 @@
+# puzzlefile.py - Read and write CrossPath puzzle files
+# 2026-10-18    PV
+
+"""
+Text format (.txt):
+    # Comment line
+    [name]
+    .6....2
+    .....X.
+    ...
+A puzzle is a block of grid lines, puzzles are separated by blank lines or a [name] line.
+Name is optional, unnamed puzzles are named after their position in the file (#1, #2...).
+
+JSON lines format (.jsonl, or any file starting with {), one puzzle per line:
+    {"name": "medium_10", "grid": [".6....2", ".....X.", ...]}
+
+Files are read as a stream, one puzzle at a time, so they can be arbitrarily large.
+"""
+
+import os
+import sys
+import json
+import itertools
+
+# Sample puzzles, formerly defined in CrossPath.py
+samplesFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples.txt')
+
+
+def ReadTextPuzzles(f):
+    name = None
+    grid = []
+    count = 0
+    for line in f:
+        line = line.strip()
+        if line.startswith('#'):
+            continue
+        if line=='' or line.startswith('['):
+            if grid:
+                count += 1
+                yield (name or '#'+str(count), grid)
+            grid = []
+            name = line[1:-1].strip() if line.startswith('[') else None
+            continue
+        grid.append(line)
+    if grid:
+        count += 1
+        yield (name or '#'+str(count), grid)
+
+def ReadJsonPuzzles(f):
+    count = 0
+    for line in f:
+        line = line.strip()
+        if line=='':
+            continue
+        count += 1
+        o = json.loads(line)
+        yield (o.get('name') or '#'+str(count), o['grid'])
+
+def ReadPuzzles(path):
+    """Generator of (name, grid) from a text or JSON lines file, '-' for stdin.  File is read as JSON lines if its
+    first non-blank line starts with {, whatever its extension"""
+    if path=='-':
+        f = sys.stdin
+    else:
+        f = open(path, encoding='utf-8')
+    try:
+        # Format is detected from first non-blank line, so that stdin can be in either format
+        head = []
+        for line in f:
+            head.append(line)
+            if line.strip():
+                break
+        lines = itertools.chain(head, f)
+        if head and head[-1].lstrip().startswith('{'):
+            yield from ReadJsonPuzzles(lines)
+        else:
+            yield from ReadTextPuzzles(lines)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def GetPuzzle(name, path=samplesFile):
+    """Grid of puzzle name in file path"""
+    for (n, grid) in ReadPuzzles(path):
+        if n==name:
+            return grid
+    raise KeyError(name)
+
+def WriteTextPuzzle(f, name, grid):
+    f.write('[' + name + ']\n')
+    for row in grid:
+        f.write(row + '\n')
+    f.write('\n')
+
+def WriteJsonPuzzle(f, name, grid, **extra):
+    o = {'name': name, 'grid': grid}
+    o.update(extra)
+    f.write(json.dumps(o) + '\n')
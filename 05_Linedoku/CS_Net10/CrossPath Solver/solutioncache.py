@@ -0,0 +1,98 @@
+# solutioncache.py - Persistent cache of solved CrossPath puzzles, shared by rotations and mirror images
+# 2026-10-18    PV
+
+"""
+A grid has 8 symmetric images (4 rotations, each possibly mirrored), built with an optional
+transposition followed by optional vertical and horizontal flips.  Extension letters are
+remapped with cells: transposition swaps N/W and S/E, vertical flip swaps N/S, horizontal flip
+swaps W/E.  Canonical form of a puzzle is the smallest of its 8 images as text, and its key is
+the SHA-1 of canonical text.
+
+Results are stored in a sqlite database, per key and solver, with the solution in canonical
+orientation, so that a puzzle seen in any orientation costs one canonical form and one lookup.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+
+# Transforms as (transpose, vertical flip, horizontal flip), applied in this order
+transforms = [(t, v, h) for t in (False, True) for v in (False, True) for h in (False, True)]
+
+swapTranspose = str.maketrans('NWSE', 'WNES')
+swapVertical = str.maketrans('NS', 'SN')
+swapHorizontal = str.maketrans('WE', 'EW')
+
+
+def Transform(rows, transform):
+    """Image of grid rows (list of strings) by transform"""
+    (t, v, h) = transform
+    if t:
+        rows = [''.join(col).translate(swapTranspose) for col in zip(*rows)]
+    if v:
+        rows = [row.translate(swapVertical) for row in rows[::-1]]
+    if h:
+        rows = [row[::-1].translate(swapHorizontal) for row in rows]
+    return rows
+
+def Inverse(transform):
+    """Transform undoing transform: after a transposition, flips swap axes"""
+    (t, v, h) = transform
+    return (t, h, v) if t else transform
+
+def Canonical(rows):
+    """Returns (key, transform) where Transform(rows, transform) is the canonical form of rows"""
+    (text, transform) = min(('\n'.join(Transform(rows, tr)), tr) for tr in transforms)
+    return (hashlib.sha1(text.encode('ascii')).hexdigest(), transform)
+
+
+class SolutionCache(object):
+    """Solver results stored in sqlite database path, with hits and misses counts"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT, solver TEXT, result TEXT, PRIMARY KEY (key, solver))')
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
+
+    def Close(self):
+        self.db.commit()
+        self.db.close()
+
+    def Lookup(self, grid, solver):
+        """Returns (key, transform, result) for grid, result being None if not in cache, else a dict with solved,
+        solution rows in grid orientation, and solutions for count solver"""
+        (key, transform) = Canonical(grid)
+        row = self.db.execute('SELECT result FROM results WHERE key=? AND solver=?', (key, solver)).fetchone()
+        if row is None:
+            self.misses += 1
+            return (key, transform, None)
+        self.hits += 1
+        result = json.loads(row[0])
+        result['solution'] = Transform(result['solution'], Inverse(transform))
+        return (key, transform, result)
+
+    def Store(self, key, transform, solver, result):
+        """Store result of SolveOne (solved, solution and solutions if present) for a grid of given key and
+        transform, returned by Lookup"""
+        stored = {k: result[k] for k in ('solved', 'solutions') if k in result}
+        stored['solution'] = Transform(result['solution'], transform)
+        self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, solver, json.dumps(stored)))
+
+    def Stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def CachedResult(name, result, t0):
+    """SolveOne-like result dict for a cache hit"""
+    res = {'name': name}
+    res.update(result)
+    res.update({'nodes': 0, 'time': time.perf_counter()-t0, 'cached': True})
+    return res
@@ -0,0 +1,239 @@
+# vectorized.py - Optional NumPy engine applying CrossPath rules with whole grid sweeps
+# 2026-10-18    PV
+
+"""
+Each sweep computes for the whole grid, with cumulative max/sum along the 4 oriented views of
+the grid (rows, reversed rows, columns, reversed columns):
+- for each free cell, the nearest center able to reach it in each direction
+- for each center, the number of free cells it can reach in each direction
+Then every forced move found is fired in a batch:
+- single ray: a free cell reached by only one center is filled up to it by this center
+- must pass: count of a center that its other directions can't take is used in direction d
+  (this includes single direction and capacity rules of puzzle)
+and contradictions (free cell unreachable, center without enough free cells) stop the sweeps.
+
+Moves of a batch are found on the same grid.  Moves whose segments (center to farthest cell
+filled) don't share any cell can't change each other's premise, and are applied at once with
+difference arrays.  Other moves are checked again one by one just before being applied; a move
+whose premise was changed by an earlier move is skipped, the next sweep will see the new grid.
+The fixpoint is the same as puzzle.solve() with default rules.
+
+NumPy is optional: if it's not installed, available is False and SolveRules raises ImportError.
+The engine always applies all rules, so SolveRules raises ValueError for a puzzle restricted to
+some rules (ruleNames), rather than silently ignoring the restriction.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from puzzle import FREE, N, cellChars, codeOf, ruleTable
+
+available = np is not None
+
+
+class ReachEngine(object):
+    """Grid of cell codes as a 2D NumPy array, with rules applied by sweeps"""
+
+    def __init__(self, ts):
+        if np is None:
+            raise ImportError('NumPy is required by vectorized engine')
+        self.rows = len(ts)
+        self.columns = len(ts[0])
+        self.g = np.array([[codeOf[ch] for ch in s] for s in ts], dtype=np.int16)
+        self.sweeps = 0
+        self.moves = 0
+        self.skipped = 0
+
+    def Rows(self):
+        return [''.join(cellChars[v] for v in row) for row in self.g.tolist()]
+
+    def Views(self, a):
+        """Oriented views of a grid array for directions N, S, W, E: a center extends towards increasing column index"""
+        return (a.T[:, ::-1], a.T, a[:, ::-1], a)
+
+    def Unorient(self, d, a):
+        """Array computed on oriented view of direction d, back in grid orientation"""
+        return (a[:, ::-1].T, a.T, a[:, ::-1], a)[d]
+
+    def Sweep(self):
+        """Returns None if a contradiction is found, else forced moves as arrays (centers indexes, directions,
+        distances), distance being the one of the farthest cell to fill, one move per center and direction"""
+        self.sweeps += 1
+        size = self.rows*self.columns
+        flatIndex = np.arange(size).reshape(self.rows, self.columns)
+        free = self.g==FREE
+        reached = []        # Per direction, free cells reached
+        source = []         # Per direction, index of nearest center of free cells
+        dist = []           # Per direction, distance of free cells from nearest center
+        capacity = []       # Per direction, free cells reachable by each center (flat)
+        counts = []         # Per direction, free cells from nearest center up to free cells included
+        for d, v in enumerate(self.Views(self.g)):
+            vfree = v==FREE
+            blocker = ~(vfree | (v==N+d))
+            pos = np.arange(v.shape[1])
+            last = np.maximum.accumulate(np.where(blocker, pos, -1), axis=1)
+            safe = np.maximum(last, 0)
+            code = np.take_along_axis(v, safe, axis=1)
+            cum = np.cumsum(vfree, axis=1)
+            count = cum-np.take_along_axis(cum, safe, axis=1)
+            ok = vfree & (last>=0) & (code<=9) & (count<=code)
+            src = self.Unorient(d, np.take_along_axis(self.Views(flatIndex)[d], safe, axis=1))
+            distance = self.Unorient(d, pos-last)
+            reached.append(self.Unorient(d, ok))
+            source.append(src)
+            dist.append(distance)
+            counts.append(self.Unorient(d, count))
+            capacity.append(np.bincount(src[reached[-1]], minlength=size))
+
+        reachCount = sum(r.astype(np.int8) for r in reached)
+        if np.any(free & (reachCount==0)):
+            return None
+        g = self.g.ravel()
+        active = (g>=1) & (g<=9)
+        total = sum(capacity)
+        if np.any(active & (total<g)):
+            return None
+
+        keys = []
+        dists = []
+        # Must pass, target is the free cell at rank need from center
+        for d in range(4):
+            need = np.where(active, g-(total-capacity[d]), 0)
+            target = reached[d] & (counts[d]==need[source[d]])
+            if np.any(target):
+                keys.append(source[d][target]*4+d)
+                dists.append(dist[d][target])
+        # Single ray
+        single = free & (reachCount==1)
+        if np.any(single):
+            d = np.argmax(np.stack([r[single] for r in reached]), axis=0)
+            keys.append(np.choose(d, [s[single] for s in source])*4+d)
+            dists.append(np.choose(d, [x[single] for x in dist]))
+        if not keys:
+            return (np.zeros(0, dtype=np.int64),)*3
+
+        # One move per center and direction, the farthest one
+        keys = np.concatenate(keys)
+        dists = np.concatenate(dists)
+        order = np.lexsort((dists, keys))
+        keys = keys[order]
+        dists = dists[order]
+        last = np.append(keys[1:]!=keys[:-1], True)
+        return (keys[last]>>2, keys[last]&3, dists[last])
+
+    def Segments(self, centers, d, dist):
+        """Moves as segments (line, first, last) of positions from center to farthest cell included, on rows for
+        horizontal moves and columns for vertical ones"""
+        (r, c) = np.divmod(centers, self.columns)
+        horizontal = d>=2
+        line = np.where(horizontal, r, c)
+        pos = np.where(horizontal, c, r)
+        forward = (d&1)==1
+        first = np.where(forward, pos, pos-dist)
+        last = np.where(forward, pos+dist, pos)
+        return (horizontal, line, first, last)
+
+    def Batch(self, centers, d, dist):
+        """Apply moves whose segments don't share any cell with another move at once, returns the indexes of
+        other moves, that must be checked one by one since an earlier move may have changed their premise"""
+        (horizontal, line, first, last) = self.Segments(centers, d, dist)
+        # Count of moves covering each cell, using difference arrays along rows and columns
+        diff = np.zeros((self.rows, self.columns+1), dtype=np.int32)
+        np.add.at(diff, (line[horizontal], first[horizontal]), 1)
+        np.add.at(diff, (line[horizontal], last[horizontal]+1), -1)
+        cover = np.cumsum(diff, axis=1)[:, :-1]
+        diff = np.zeros((self.columns, self.rows+1), dtype=np.int32)
+        np.add.at(diff, (line[~horizontal], first[~horizontal]), 1)
+        np.add.at(diff, (line[~horizontal], last[~horizontal]+1), -1)
+        cover += np.cumsum(diff, axis=1)[:, :-1].T
+
+        # Moves over a shared cell, and free cells of each move, with prefix sums along lines
+        shared = cover>1
+        free = self.g==FREE
+        conflict = np.zeros(len(centers), dtype=bool)
+        filled = np.zeros(len(centers), dtype=np.int64)
+        for h, a, b in ((True, shared, free), (False, shared.T, free.T)):
+            sel = horizontal==h
+            for values, out in ((a, conflict), (b, filled)):
+                prefix = np.zeros((values.shape[0], values.shape[1]+1), dtype=np.int32)
+                np.cumsum(values, axis=1, out=prefix[:, 1:])
+                out[sel] = prefix[line[sel], last[sel]+1]-prefix[line[sel], first[sel]]
+
+        # Paint free cells of independent moves with extension letter of their direction
+        ok = ~conflict
+        for dd in range(4):
+            sel = ok & (d==dd)
+            h = dd>=2
+            diff = np.zeros((self.rows, self.columns+1) if h else (self.columns, self.rows+1), dtype=np.int32)
+            np.add.at(diff, (line[sel], first[sel]), 1)
+            np.add.at(diff, (line[sel], last[sel]+1), -1)
+            paint = np.cumsum(diff, axis=1)[:, :-1]>0
+            if not h:
+                paint = paint.T
+            self.g[paint & free] = N+dd
+        g = self.g.ravel()
+        g[centers[ok]] -= filled[ok].astype(np.int16)
+        self.moves += int(ok.sum())
+        return np.flatnonzero(conflict)
+
+    def Line(self, i, d):
+        """View of the cells from center at index i in direction d, nearest first"""
+        (r, c) = divmod(i, self.columns)
+        if d==0:
+            return self.g[:r, c][::-1]
+        if d==1:
+            return self.g[r+1:, c]
+        if d==2:
+            return self.g[r, :c][::-1]
+        return self.g[r, c+1:]
+
+    def Apply(self, i, d, dist):
+        """Check and apply a move found by Sweep: fill free cells up to distance dist from center, that must still
+        be free and reachable.  Returns False if it's skipped"""
+        (r, c) = divmod(i, self.columns)
+        v = int(self.g[r, c])
+        line = self.Line(i, d)
+        passable = (line==FREE) | (line==N+d)
+        end = int(np.argmin(passable)) if not passable.all() else len(line)
+        cells = np.flatnonzero(line[:end]==FREE)
+        n = int(np.searchsorted(cells, dist-1))+1
+        if n>v or n>len(cells) or cells[n-1]!=dist-1:
+            self.skipped += 1
+            return False
+        line[cells[:n]] = N+d
+        self.g[r, c] = v-n
+        self.moves += 1
+        return True
+
+    def Run(self):
+        """Apply rules until no forced move remains.  Returns False if a contradiction is found"""
+        while True:
+            moves = self.Sweep()
+            if moves is None:
+                return False
+            (centers, d, dist) = moves
+            if len(centers)==0:
+                return True
+            for k in self.Batch(centers, d, dist):
+                self.Apply(int(centers[k]), int(d[k]), int(dist[k]))
+
+    def IsSolved(self):
+        return not np.any(self.g==FREE)
+
+
+def SolveRules(p):
+    """Solver for puzzle p using rules only, as puzzle.solve(), computed by ReachEngine.  Puzzle p is updated
+    with the grid reached, sweeps and deductions counts are in sweeps and deductions"""
+    if set(p.rules)!=set(ruleTable):
+        raise ValueError('NumPy engine always applies all rules, it can\'t use rules %s only' % ','.join(p.rules))
+    engine = ReachEngine(p.Rows())
+    ok = engine.Run()
+    for i, ch in enumerate(''.join(engine.Rows())):
+        if p.g[i]!=codeOf[ch]:
+            p.SetCell(i, codeOf[ch])
+    p.BuildIndex()
+    p.sweeps = engine.sweeps
+    p.deductions += engine.moves
+    return ok and engine.IsSolved()
@@ -7,9 +7,33 @@
 # 2018-09-06    PV
 # 2020-09-03    PV      1.1: Unicode 13, Tcl support >0xFFFF, list contains UTF-8 and UTF-16
 # 2020-12-31    PV      1.2: Added Scripts.txt, GetUnknown(cp)
+# 2026-10-18    PV      1.3: Parsed data compiled in binary cache UniData.bin, memory-mapped at import, rebuilt when sources change
+# 2026-10-18    PV      1.4: <..., First>/<..., Last> ranges stored as a range table, records and names built on demand
+# 2026-10-18    PV      1.5: Category and script stored in two-stage tables (block index + deduplicated blocks)
+# 2026-10-18    PV      1.6: Lazy thread-safe loading on first use, data files found relative to module or in SetDataDirectory
+# 2026-10-18    PV      1.7: Names search: words, prefix completion, fuzzy words, results as lazy iterators
+# 2026-10-18    PV      1.8: CodepointSet bitsets per script and category, with set operations, ranges and regex class
+# 2026-10-18    PV      1.9: GetDetails, all columns of a whole string in one pass
+# 2026-10-18    PV      1.10: Optional Blocks, DerivedAge, NameAliases and emoji-data read as range tables
+# 2026-10-18    PV      1.11: UnicodeVersionStore, several UCD versions with shared storage, and version diffs
+# 2026-10-18    PV      1.12: Names sorted in cache instead of a name dict per process, tables shareable with worker processes
 
-from types import MappingProxyType
-from typing import Dict, List
+import os
+import gc
+import atexit
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import threading
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from heapq import merge
+from itertools import islice
+from typing import Dict, List, Set, Tuple, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass
 
 
@@ -62,86 +86,1134 @@ class CharacterRecord:
         return GetUTF8String(self.Codepoint)
 
 
-# Read information file UnicodeVersion.txt
-UnicodeVersion = ''
-with open('UnicodeVersion.txt', encoding='utf-8') as uv:
-    UnicodeVersion = uv.readline()
+# UCD source files, and compiled cache of their content, in module directory unless UNIDATA_DIR environment
+# variable or SetDataDirectory() specify another directory
+_SOURCE_FILES = ('UnicodeVersion.txt', 'UnicodeData.txt', 'Scripts.txt')
+_CACHE_FILE = 'UniData.bin'
+_CACHE_MAGIC = b'UNIDATA5'
 
-_codepoint_map: Dict[int, CharacterRecord] = {}
+# Optional UCD files in 'range ; value' format, and property they define.  None means that values are names of
+# binary properties (emoji-data.txt: Emoji, Emoji_Presentation...).  NameAliases.txt has 2 fields, alias and type
+_PROPERTY_FILES = {
+    'Blocks.txt': 'Block',
+    'DerivedAge.txt': 'Age',
+    'NameAliases.txt': 'Name_Alias',
+    'emoji-data.txt': None,
+}
+_data_directory = os.environ.get('UNIDATA_DIR') or os.path.dirname(os.path.abspath(__file__))
 
-# Read name and category from UnicodeData.txt
-with open('UnicodeData.txt', encoding='utf-8') as ud:
-    for line in (ud):
-        fields: List[str] = line.split(';')
-        codepoint = int(fields[0], 16)
-        char_name = fields[1]
-        char_category = fields[2]
+# Two-stage tables: codepoint cp is at offset cp & _BLOCK_MASK of block stage1[cp >> _BLOCK_SHIFT] in stage2
+_BLOCK_SHIFT = 7
+_BLOCK_SIZE = 1 << _BLOCK_SHIFT
+_BLOCK_MASK = _BLOCK_SIZE - 1
 
-        # Special name overrides
-        if codepoint == 28:
-            char_name = "CONTROL - FILE SEPARATOR"
-        else:
-            if codepoint == 29:
-                char_name = "CONTROL - GROUP SEPARATOR"
+# Range of codepoints sharing category and script, with names prefix - XXXX: (start, end, prefix, category, script)
+RangeRecord = Tuple[int, int, str, str, str]
+
+
+def _DataFile(directory: str, file: str) -> str:
+    return os.path.join(directory, file)
+
+def _ReadUnicodeVersion(directory: str) -> str:
+    # Read information file UnicodeVersion.txt
+    with open(_DataFile(directory, 'UnicodeVersion.txt'), encoding='utf-8') as uv:
+        return uv.readline()
+
+def _ReadRanges(directory: str, file: str) -> Iterator[Tuple[int, int, List[str]]]:
+    """Streaming reader of UCD files made of lines 'XXXX[..YYYY] ; field [; field...] # comment', returns
+    (first, last, fields) for each line"""
+    with open(_DataFile(directory, file), encoding='utf-8') as ud:
+        for line in (ud):
+            p = line.find('#')
+            if p >= 0:
+                line = line[:p]
+            fields = [field.strip() for field in line.split(';')]
+            if len(fields) < 2:
+                continue
+            (first, _, last) = fields[0].partition('..')
+            yield (int(first, 16), int(last or first, 16), fields[1:])
+
+def _ReadScripts(directory: str) -> List[Tuple[int, int, str]]:
+    """Sorted list of (first, last, script) from Scripts.txt"""
+    return sorted((first, last, fields[0]) for (first, last, fields) in _ReadRanges(directory, 'Scripts.txt'))
+
+def _ReadProperties(directory: str) -> Dict[str, List[Tuple[int, int, str]]]:
+    """Property -> sorted list of (first, last, value) from optional property files present, adjacent ranges with
+    the same value being merged.  Memory used is proportional to the number of ranges"""
+    properties: Dict[str, List[Tuple[int, int, str]]] = {}
+    for file, prop in _PROPERTY_FILES.items():
+        if not os.path.exists(_DataFile(directory, file)):
+            continue
+        for (first, last, fields) in _ReadRanges(directory, file):
+            if prop is None:
+                properties.setdefault(fields[0], []).append((first, last, 'Y'))
+            else:
+                properties.setdefault(prop, []).append((first, last, ';'.join(fields)))
+    for prop, ranges in properties.items():
+        ranges.sort(key=lambda r: r[:2])        # Stable, aliases of a codepoint stay in file order
+        merged = ranges[:1]
+        for (first, last, value) in ranges[1:]:
+            (pfirst, plast, pvalue) = merged[-1]
+            if first == plast+1 and value == pvalue:
+                merged[-1] = (pfirst, last, value)
             else:
-                if codepoint == 30:
-                    char_name = "CONTROL - RECORD SEPARATOR"
+                merged.append((first, last, value))
+        properties[prop] = merged
+    return properties
+
+def _ReadUnicodeData(directory: str) -> Tuple[Dict[int, CharacterRecord], List[RangeRecord]]:
+    """Individual records, and ranges defined by <..., First>/<..., Last> lines, split where script changes"""
+    codepoint_map: Dict[int, CharacterRecord] = {}
+    ranges: List[RangeRecord] = []
+
+    # Read name and category from UnicodeData.txt
+    with open(_DataFile(directory, 'UnicodeData.txt'), encoding='utf-8') as ud:
+        for line in (ud):
+            fields: List[str] = line.split(';')
+            codepoint = int(fields[0], 16)
+            char_name = fields[1]
+            char_category = fields[2]
+
+            # Special name overrides
+            if codepoint == 28:
+                char_name = "CONTROL - FILE SEPARATOR"
+            else:
+                if codepoint == 29:
+                    char_name = "CONTROL - GROUP SEPARATOR"
                 else:
-                    if codepoint == 31:
-                        char_name = "CONTROL - UNIT SEPARATOR"
+                    if codepoint == 30:
+                        char_name = "CONTROL - RECORD SEPARATOR"
                     else:
-                        if codepoint < 32 or codepoint >= 0x7f and codepoint < 0xA0:
-                            char_name = "CONTROL - " + (fields[10] if len(fields[10]) > 0 else fields[0][2:])
-
-        is_range = char_name.endswith(', First>')
-        if is_range:    # add all characters within a specified range
-            char_name = char_name.replace(', First>', '').replace('<', '').upper()  # remove range indicator from name
-            line = next(ud)
-            fields = line.split(';')
-            end_char_code = int(fields[0], 16)
-            if not fields[1].endswith(', Last>'):
-                raise Exception('Expected end-of-range indicator.')
-            for code_in_range in range(codepoint, end_char_code+1):
-                _codepoint_map[code_in_range] = CharacterRecord(
-                    code_in_range, f'{char_name} - {code_in_range:X}', char_category, 'Unknown')
-        else:
-            _codepoint_map[codepoint] = CharacterRecord(codepoint, char_name, char_category, 'Unknown')
-
-# Read script from Scripts.txt
-with open('Scripts.txt', encoding='utf-8') as ud:
-    for line in (ud):
-        p = line.find('#')
-        if p >= 0:
-            line = line[:p]
-        if len(line) == 0 or line == '\n':
-            continue
-        fields = line.split(';')
-        codepoint_range = fields[0].strip()
-        script_name = fields[1].strip()
-        p = codepoint_range.find('..')
-        if p < 0:
-            codepoint = int(codepoint_range, 16)
-            _codepoint_map[codepoint].Script = script_name
-        else:
-            from_codepoint = int(codepoint_range[:p], 16)
-            to_codepoint = int(codepoint_range[p+2:], 16)
-            for codepoint in range(from_codepoint, to_codepoint+1):
-                _codepoint_map[codepoint].Script = script_name
+                        if codepoint == 31:
+                            char_name = "CONTROL - UNIT SEPARATOR"
+                        else:
+                            if codepoint < 32 or codepoint >= 0x7f and codepoint < 0xA0:
+                                char_name = "CONTROL - " + (fields[10] if len(fields[10]) > 0 else fields[0][2:])
+
+            is_range = char_name.endswith(', First>')
+            if is_range:    # range of characters, named prefix - XXXX
+                char_name = char_name.replace(', First>', '').replace('<', '').upper()  # remove range indicator from name
+                line = next(ud)
+                fields = line.split(';')
+                end_char_code = int(fields[0], 16)
+                if not fields[1].endswith(', Last>'):
+                    raise Exception('Expected end-of-range indicator.')
+                ranges.append((codepoint, end_char_code, char_name, char_category, 'Unknown'))
+            else:
+                codepoint_map[codepoint] = CharacterRecord(codepoint, char_name, char_category, 'Unknown')
+
+    # Scripts, ranges being split on script boundaries
+    scripts = _ReadScripts(directory)
+    starts = [first for first, _, _ in scripts]
+    for cr in codepoint_map.values():
+        k = bisect_left(starts, cr.Codepoint+1) - 1
+        if k >= 0 and cr.Codepoint <= scripts[k][1]:
+            cr.Script = scripts[k][2]
+    split_ranges: List[RangeRecord] = []
+    for (first, last, prefix, category, _) in ranges:
+        cp = first
+        while cp <= last:
+            k = bisect_left(starts, cp+1) - 1
+            if k >= 0 and cp <= scripts[k][1]:
+                (end, script) = (min(last, scripts[k][1]), scripts[k][2])
+            else:
+                # Up to next script range start, or end of range
+                (end, script) = (min(last, starts[k+1]-1 if k+1 < len(starts) else last), 'Unknown')
+            split_ranges.append((cp, end, prefix, category, script))
+            cp = end + 1
+
+    return (codepoint_map, split_ranges)
 
 
-# For public access, readonly dict of CharacterRecord
-CharacterRecords: MappingProxyType[int, CharacterRecord] = MappingProxyType(_codepoint_map)
+def _TwoStage(values: bytearray) -> Tuple[array, bytes]:
+    """Split a byte per codepoint table in blocks, identical blocks being stored once: returns (block index of
+    each block of codepoints, concatenated distinct blocks)"""
+    blocks: Dict[bytes, int] = {}
+    stage1 = array('H')
+    for start in range(0, len(values), _BLOCK_SIZE):
+        block = bytes(values[start:start+_BLOCK_SIZE])
+        stage1.append(blocks.setdefault(block, len(blocks)))
+    return (stage1, b''.join(blocks))
+
+
+class _RangeTable:
+    """Property stored as sorted ranges (first, last, code of value in values).  Ranges don't overlap, except
+    identical ones for multi-valued properties such as Name_Alias"""
+
+    def __init__(self, firsts, lasts, codes, values: List[str]):
+        self.firsts = firsts
+        self.lasts = lasts
+        self.codes = codes
+        self.values = values
+
+    def Values(self, cp: int) -> List[str]:
+        """Values of ranges containing cp, in file order"""
+        k = bisect_right(self.firsts, cp) - 1
+        result: List[str] = []
+        i = k
+        while i >= 0 and self.firsts[i] == self.firsts[k]:
+            if cp <= self.lasts[i]:
+                result.append(self.values[self.codes[i]])
+            i -= 1
+        result.reverse()
+        return result
+
+    def Value(self, cp: int) -> Optional[str]:
+        k = bisect_right(self.firsts, cp) - 1
+        return self.values[self.codes[k]] if k >= 0 and cp <= self.lasts[k] else None
+
+    def Ranges(self, value: Optional[str] = None) -> List[Tuple[int, int]]:
+        """(first, last) of ranges having value, or all ranges"""
+        if value is None:
+            return list(zip(self.firsts, self.lasts))
+        if value not in self.values:
+            return []
+        code = self.values.index(value)
+        return [(first, last) for first, last, c in zip(self.firsts, self.lasts, self.codes) if c == code]
+
+
+class _Tables:
+    """UCD data as compact columns.  Category and script of each codepoint are indexes in categories and scripts
+    lists, stored in two-stage tables; category 0 is '??' for unassigned codepoints.  Names are in a single ASCII
+    buffer with offsets, for individual codepoints sorted in codepoints column.  Ranges are stored separately as
+    columns of first and last codepoint, and index of names prefix in prefixes list.  Optional properties are range
+    tables, in columns 'property.firsts', 'property.lasts' and 'property.codes' (index in values list of property).
+    Columns are arrays when built from source files, or memoryviews on the memory-mapped cache file, typed on first
+    use so that pages of columns never used are not even read"""
+
+    def __init__(self, version: str, categories: List[str], scripts: List[str], prefixes: List[str],
+                 properties: Dict[str, List[str]], columns: Dict[str, object]):
+        self.version = version
+        self.categories = categories
+        self.scripts = scripts
+        self.prefixes = prefixes
+        self.properties = properties
+        self._columns = columns
+        self._range_tables: Dict[str, _RangeTable] = {}
+
+    def __getattr__(self, name: str):
+        # Only called for columns not accessed yet.  Concurrent first accesses just build the same view twice
+        if name not in self._COLUMNS:
+            raise AttributeError(name)
+        column = self.Column(name)
+        setattr(self, name, column)
+        return column
+
+    def Column(self, name: str):
+        column = self._columns[name]
+        if isinstance(column, memoryview):
+            if name in self._UINT_COLUMNS or name.endswith(('.firsts', '.lasts')):
+                column = column.cast('I')
+            elif name in self._USHORT_COLUMNS or name.endswith('.codes'):
+                column = column.cast('H')
+        return column
+
+    def RangeTable(self, prop: str) -> Optional[_RangeTable]:
+        """Range table of an optional property, None if its file was not found"""
+        table = self._range_tables.get(prop)
+        if table is None and prop in self.properties:
+            table = self._range_tables[prop] = _RangeTable(self.Column(prop + '.firsts'), self.Column(prop + '.lasts'),
+                                                           self.Column(prop + '.codes'), self.properties[prop])
+        return table
+
+    @staticmethod
+    def FromSources(version: str, records: Dict[int, CharacterRecord], ranges: List[RangeRecord],
+                    property_ranges: Dict[str, List[Tuple[int, int, str]]]) -> '_Tables':
+        codepoints = array('I', sorted(records))
+        categories = ['??'] + sorted({cr.Category for cr in records.values()} | {r[3] for r in ranges})
+        scripts = sorted({cr.Script for cr in records.values()} | {r[4] for r in ranges} | {'Unknown'})
+        prefixes = sorted({r[2] for r in ranges})
+        category_index = {c: i for i, c in enumerate(categories)}
+        script_index = {s: i for i, s in enumerate(scripts)}
+        prefix_index = {p: i for i, p in enumerate(prefixes)}
+        names = bytearray()
+        name_offsets = array('I', [0])
+        for cp in codepoints:
+            names += records[cp].Name.encode('ascii')
+            name_offsets.append(len(names))
+        category_codes = bytearray(MAXCODEPOINT+1)
+        script_codes = bytearray([script_index['Unknown']]) * (MAXCODEPOINT+1)
+        for cr in records.values():
+            category_codes[cr.Codepoint] = category_index[cr.Category]
+            script_codes[cr.Codepoint] = script_index[cr.Script]
+        for (first, last, _, category, script) in ranges:
+            category_codes[first:last+1] = bytes([category_index[category]]) * (last-first+1)
+            script_codes[first:last+1] = bytes([script_index[script]]) * (last-first+1)
+        (category_index1, category_blocks) = _TwoStage(category_codes)
+        (script_index1, script_blocks) = _TwoStage(script_codes)
+        columns = {
+            'codepoints': codepoints,
+            'name_offsets': name_offsets,
+            'names': bytes(names),
+            'name_order': array('I', sorted(range(len(codepoints)), key=lambda k: records[codepoints[k]].Name.lower())),
+            'range_firsts': array('I', [r[0] for r in ranges]),
+            'range_lasts': array('I', [r[1] for r in ranges]),
+            'range_prefixes': bytes(prefix_index[r[2]] for r in ranges),
+            'category_index': category_index1,
+            'category_blocks': category_blocks,
+            'script_index': script_index1,
+            'script_blocks': script_blocks,
+        }
+        properties: Dict[str, List[str]] = {}
+        for prop, prop_ranges in property_ranges.items():
+            values = properties[prop] = sorted({value for _, _, value in prop_ranges})
+            value_index = {v: i for i, v in enumerate(values)}
+            columns[prop + '.firsts'] = array('I', [r[0] for r in prop_ranges])
+            columns[prop + '.lasts'] = array('I', [r[1] for r in prop_ranges])
+            columns[prop + '.codes'] = array('H', [value_index[r[2]] for r in prop_ranges])
+        return _Tables(version, categories, scripts, prefixes, properties, columns)
+
+    # Cache file: magic, SHA-256 of source files, length of JSON metadata and metadata (version, lists of
+    # categories, scripts, prefixes and property values, byte order, [offset, length] of each column), then columns
+    # aligned on 8 bytes
+    _COLUMNS = ('codepoints', 'name_offsets', 'names', 'name_order', 'range_firsts', 'range_lasts', 'range_prefixes',
+                'category_index', 'category_blocks', 'script_index', 'script_blocks')
+    _UINT_COLUMNS = ('codepoints', 'name_offsets', 'name_order', 'range_firsts', 'range_lasts')
+    _USHORT_COLUMNS = ('category_index', 'script_index')
+
+    def Pack(self, source_hash: bytes) -> bytes:
+        names = list(self._columns)
+        columns = [bytes(self.Column(name)) for name in names]
+        meta = {'version': self.version, 'categories': self.categories, 'scripts': self.scripts, 'prefixes': self.prefixes,
+                'properties': self.properties, 'byteorder': sys.byteorder, 'itemsize': array('I').itemsize, 'columns': {}}
+        # Metadata size depends on offsets, so columns are placed after a header of bounded size
+        offset = 8 * ((len(_CACHE_MAGIC) + len(source_hash) + 4 + len(json.dumps(meta)) + 40*len(columns) + 7) // 8)
+        for name, data in zip(names, columns):
+            meta['columns'][name] = [offset, len(data)]
+            offset += 8 * ((len(data) + 7) // 8)
+        header = json.dumps(meta).encode('utf-8')
+        buffer = bytearray(offset)
+        buffer[:len(_CACHE_MAGIC)+len(source_hash)+4+len(header)] = _CACHE_MAGIC + source_hash + struct.pack('<I', len(header)) + header
+        for name, data in zip(names, columns):
+            (start, length) = meta['columns'][name]
+            buffer[start:start+length] = data
+        return bytes(buffer)
+
+    @staticmethod
+    def Unpack(buffer, source_hash: Optional[bytes]) -> Optional['_Tables']:
+        """Tables on buffer content, without copy, or None if buffer is not a cache of current source files.  Source
+        files are not checked when source_hash is None"""
+        p = len(_CACHE_MAGIC)
+        if bytes(buffer[:p]) != _CACHE_MAGIC or source_hash is not None and bytes(buffer[p:p+len(source_hash)]) != source_hash:
+            return None
+        p += hashlib.sha256().digest_size
+        (length,) = struct.unpack('<I', buffer[p:p+4])
+        meta = json.loads(bytes(buffer[p+4:p+4+length]))
+        if meta['byteorder'] != sys.byteorder or meta['itemsize'] != array('I').itemsize:
+            return None
+        view = memoryview(buffer)
+        columns = {name: view[start:start+length] for name, (start, length) in meta['columns'].items()}
+        return _Tables(meta['version'], meta['categories'], meta['scripts'], meta['prefixes'], meta['properties'], columns)
+
+    def Find(self, cp: int) -> int:
+        """Index of codepoint cp in individual records columns, or -1"""
+        k = bisect_left(self.codepoints, cp)
+        return k if k < len(self.codepoints) and self.codepoints[k] == cp else -1
+
+    def FindRange(self, cp: int) -> int:
+        """Index of range containing codepoint cp in range columns, or -1"""
+        k = bisect_left(self.range_firsts, cp+1) - 1
+        return k if k >= 0 and cp <= self.range_lasts[k] else -1
+
+    def Name(self, k: int) -> str:
+        return str(self.names[self.name_offsets[k]:self.name_offsets[k+1]], 'ascii')
+
+    def FindName(self, name: str) -> int:
+        """Codepoint of individual name (lowercase), or -1, by bisection in names order"""
+        (lo, hi) = (0, len(self.name_order))
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.Name(self.name_order[mid]).lower() < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.name_order) and self.Name(self.name_order[lo]).lower() == name:
+            return self.codepoints[self.name_order[lo]]
+        return -1
 
+    def Category(self, cp: int) -> int:
+        """Category code of codepoint cp, 0 if it's not assigned"""
+        return self.category_blocks[(self.category_index[cp >> _BLOCK_SHIFT] << _BLOCK_SHIFT) + (cp & _BLOCK_MASK)]
 
-# Use another internal dict for efficient mapping name -> codepoint, though it's not used much in this app
-_name_map: Dict[str, int] = {cr.Name.lower(): cr.Codepoint for cr in _codepoint_map.values()}
+    def Script(self, cp: int) -> int:
+        return self.script_blocks[(self.script_index[cp >> _BLOCK_SHIFT] << _BLOCK_SHIFT) + (cp & _BLOCK_MASK)]
 
+    def CodepointName(self, cp: int) -> str:
+        """Name of an assigned codepoint cp"""
+        k = self.Find(cp)
+        if k >= 0:
+            return self.Name(k)
+        return f'{self.prefixes[self.range_prefixes[self.FindRange(cp)]]} - {cp:X}'
+
+    def Lookup(self, cp: int) -> Optional[Tuple[str, int, int]]:
+        """(name, category code, script code) of codepoint cp, or None if it's not assigned"""
+        if not 0 <= cp <= MAXCODEPOINT:
+            return None
+        category = self.Category(cp)
+        if category == 0:
+            return None
+        return (self.CodepointName(cp), category, self.Script(cp))
+
+    def Count(self) -> int:
+        return len(self.codepoints) + sum(last-first+1 for first, last in zip(self.range_firsts, self.range_lasts))
+
+    def Codepoints(self) -> Iterator[int]:
+        """All assigned codepoints, in increasing order"""
+        return merge(self.codepoints, *(range(first, last+1) for first, last in zip(self.range_firsts, self.range_lasts)))
+
+
+def _SourcesHash(directory: str) -> bytes:
+    h = hashlib.sha256()
+    for file in _SOURCE_FILES:
+        with open(_DataFile(directory, file), 'rb') as f:
+            h.update(f.read())
+    # Optional files, so that cache is rebuilt when one is added or removed
+    for file in _PROPERTY_FILES:
+        h.update(file.encode('ascii'))
+        if os.path.exists(_DataFile(directory, file)):
+            with open(_DataFile(directory, file), 'rb') as f:
+                h.update(f.read())
+    return h.digest()
+
+def _LoadTables(directory: str) -> _Tables:
+    """Tables from cache file if it matches source files, else from source files, and cache is written again"""
+    source_hash = _SourcesHash(directory)
+    try:
+        with open(_DataFile(directory, _CACHE_FILE), 'rb') as f:
+            tables = _Tables.Unpack(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), source_hash)
+        if tables:
+            return tables
+    except (OSError, ValueError):
+        pass
+
+    tables = _Tables.FromSources(_ReadUnicodeVersion(directory), *_ReadUnicodeData(directory), _ReadProperties(directory))
+    try:
+        with open(_DataFile(directory, _CACHE_FILE) + '.tmp', 'wb') as f:
+            f.write(tables.Pack(source_hash))
+        os.replace(_DataFile(directory, _CACHE_FILE) + '.tmp', _DataFile(directory, _CACHE_FILE))
+    except OSError:
+        pass        # Read-only location, just not cached
+    return tables
+
+
+class _RecordMap(Mapping):
+    """Read-only mapping codepoint -> CharacterRecord, records are built on access from tables"""
+
+    def __init__(self, tables: _Tables):
+        self._tables = tables
+        self._len = tables.Count()
+
+    def __getitem__(self, cp: int) -> CharacterRecord:
+        r = self._tables.Lookup(cp) if isinstance(cp, int) else None
+        if r is None:
+            raise KeyError(cp)
+        return CharacterRecord(cp, r[0], self._tables.categories[r[1]], self._tables.scripts[r[2]])
+
+    def __contains__(self, cp) -> bool:
+        return isinstance(cp, int) and 0 <= cp <= MAXCODEPOINT and self._tables.Category(cp) != 0
+
+    def __iter__(self) -> Iterator[int]:
+        return self._tables.Codepoints()
+
+    def __len__(self) -> int:
+        return self._len
+
+
+# Tables and indexes are loaded on first use, under _lock so that concurrent first uses load them only once
+_lock = threading.RLock()
+_tables: Optional[_Tables] = None
+_records: Optional[_RecordMap] = None
+
+
+def _GetTables() -> _Tables:
+    global _tables
+    if _tables is None:
+        with _lock:
+            if _tables is None:
+                _tables = _LoadTables(_data_directory)
+    return _tables
+
+def SetDataDirectory(path: str) -> None:
+    """Directory of UCD files and cache, data already loaded is dropped and will be loaded again from path"""
+    global _data_directory, _tables, _records, _alias_map, _name_index
+    with _lock:
+        _data_directory = os.path.abspath(path)
+        _tables = None
+        _records = None
+        _alias_map = None
+        _name_index = None
+        _property_sets.clear()
+        _block_masks.clear()
+
+# Worker processes: with a writable cache, workers just map UniData.bin and share its pages.  Otherwise, main process
+# can place packed tables in shared memory with ShareTables(), and workers attach them with AttachTables(name), for
+# instance as initializer of a multiprocessing Pool, without reading or parsing source files
+_shared_memory = None
+
+
+def ShareTables() -> str:
+    """Copy tables in a new shared memory block, returns its name for AttachTables.  Block is released by
+    ReleaseSharedTables, or at exit of main process"""
+    global _shared_memory
+    from multiprocessing import shared_memory
+    with _lock:
+        if _shared_memory is None:
+            data = _GetTables().Pack(hashlib.sha256().digest())
+            shm = shared_memory.SharedMemory(create=True, size=len(data))
+            shm.buf[:len(data)] = data
+            _shared_memory = shm
+        return _shared_memory.name
+
+def AttachTables(name: str) -> None:
+    """Use tables in shared memory block name, created by ShareTables in main process"""
+    global _tables, _records, _alias_map, _name_index, _shared_memory
+    from multiprocessing import shared_memory
+    try:
+        shm = shared_memory.SharedMemory(name, track=False)     # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        # Block belongs to main process.  Processes started by multiprocessing share its resource tracker, where
+        # registering again changes nothing, but the tracker of an independent process would destroy it at exit
+        import multiprocessing
+        if multiprocessing.parent_process() is None:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')     # type: ignore
+    tables = _Tables.Unpack(shm.buf, None)
+    if tables is None:
+        raise ValueError(f'Shared memory block {name} does not contain UniData tables')
+    with _lock:
+        (_tables, _records, _alias_map, _name_index) = (tables, None, None, None)
+        _property_sets.clear()
+        _block_masks.clear()
+        _shared_memory = shm
+    atexit.register(_DetachTables)
+
+def _DetachTables() -> None:
+    # Views on the block must be released before it's closed, else SharedMemory complains at exit
+    global _tables, _records, _name_index, _shared_memory
+    (_tables, _records, _name_index) = (None, None, None)
+    gc.collect()
+    if _shared_memory is not None:
+        try:
+            _shared_memory.close()
+            _shared_memory = None
+        except BufferError:
+            pass
+
+def ReleaseSharedTables() -> None:
+    """Release shared memory block created by ShareTables, once workers are done"""
+    global _shared_memory
+    with _lock:
+        if _shared_memory is not None:
+            _shared_memory.close()
+            _shared_memory.unlink()
+            _shared_memory = None
+
+
+def __getattr__(name: str):
+    # Module attributes loaded on first access (PEP 562)
+    global _records
+    if name == 'UnicodeVersion':
+        return _GetTables().version
+    if name == 'CharacterRecords':
+        # For public access, readonly mapping of CharacterRecord
+        if _records is None:
+            with _lock:
+                if _records is None:
+                    _records = _RecordMap(_GetTables())
+        return _records
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Mapping name -> codepoint, though it's not used much in this app: individual names are found by bisection in names
+# order stored in tables, so nothing is built per process.  Names in ranges are parsed as prefix - XXXX, using
+# _prefix_map prefix -> indexes of ranges, and formal aliases are in _alias_map, both built on first use
+_alias_map: Optional[Dict[str, int]] = None
+_prefix_map: Dict[str, List[int]] = {}
+
+
+def _GetAliasMap() -> Dict[str, int]:
+    global _alias_map, _prefix_map
+    if _alias_map is None:
+        with _lock:
+            if _alias_map is None:
+                tables = _GetTables()
+                prefix_map: Dict[str, List[int]] = {}
+                for k, prefix in enumerate(tables.range_prefixes):
+                    prefix_map.setdefault(tables.prefixes[prefix].lower(), []).append(k)
+                _prefix_map = prefix_map
+                # Formal aliases from NameAliases.txt, if present
+                alias_map: Dict[str, int] = {}
+                aliases = tables.RangeTable('Name_Alias')
+                if aliases:
+                    for (cp, _), code in zip(aliases.Ranges(), aliases.codes):
+                        alias_map.setdefault(aliases.values[code].partition(';')[0].lower(), cp)
+                _alias_map = alias_map
+    return _alias_map
 
 def GetCodepointFromName(name: str) -> int:
-    cp = _name_map.get(name.lower(), -1)
+    alias_map = _GetAliasMap()
+    tables = _GetTables()
+    name = name.lower()
+    cp = tables.FindName(name)
+    if cp < 0:
+        cp = alias_map.get(name, -1)
+    if cp < 0:
+        (prefix, sep, hexa) = name.rpartition(' - ')
+        if sep and prefix in _prefix_map:
+            try:
+                value = int(hexa, 16)
+            except ValueError:
+                return -1
+            if f'{value:x}' == hexa and any(tables.range_firsts[k] <= value <= tables.range_lasts[k] for k in _prefix_map[prefix]):
+                cp = value
     return cp
 
 
+# Names search.  Words of names are separated by spaces and hyphens, matching is case-insensitive
+_WORD_SPLIT = re.compile(r'[ -]+')
+
+
+class _NameIndex:
+    """Inverted index word -> record indexes (sorted, so in codepoint order) of individual names containing it,
+    word -> ranges whose names prefix contains it, sorted vocabulary for words prefixes, and names sorted for
+    completion.  Queries of several words AND bitmaps of record indexes (Python ints, one bit per record), cached
+    per word.  Fuzzy matching uses a deletion index (each word with one letter removed -> words), built on first
+    fuzzy search"""
+
+    def __init__(self, tables: _Tables):
+        self.tables = tables
+        postings: Dict[str, List[int]] = {}
+        for k in range(len(tables.codepoints)):
+            for word in set(_WORD_SPLIT.split(tables.Name(k))):
+                postings.setdefault(word, []).append(k)
+        self.postings: Dict[str, array] = {word: array('I', ks) for word, ks in postings.items()}
+        self.range_postings: Dict[str, List[int]] = {}
+        for r, prefix in enumerate(tables.range_prefixes):
+            for word in set(_WORD_SPLIT.split(tables.prefixes[prefix])):
+                self.range_postings.setdefault(word, []).append(r)
+        self.vocabulary = sorted(set(self.postings) | set(self.range_postings))
+        self.sorted_names = sorted((tables.Name(k), k) for k in range(len(tables.codepoints)))
+        self.deletions: Optional[Dict[str, Set[str]]] = None
+        self.bitmaps: Dict[str, int] = {}
+        self.unions: Dict[Tuple[str, ...], int] = {}
+
+    def Bitmap(self, word: str) -> int:
+        bitmap = self.bitmaps.get(word)
+        if bitmap is None:
+            bits = bytearray((len(self.tables.codepoints) + 7) // 8)
+            for k in self.postings.get(word, ()):
+                bits[k >> 3] |= 1 << (k & 7)
+            bitmap = self.bitmaps[word] = int.from_bytes(bits, 'little')
+        return bitmap
+
+    def PrefixWords(self, prefix: str) -> List[str]:
+        # Names are ASCII, all words starting with prefix sort before prefix + DEL
+        return self.vocabulary[bisect_left(self.vocabulary, prefix):bisect_left(self.vocabulary, prefix + '\x7f')]
+
+    def FuzzyWords(self, word: str, max_distance: int) -> List[str]:
+        """Words of vocabulary at edit distance <= max_distance of word (1 or 0), found with the deletion index"""
+        if max_distance <= 0 or len(word) < 3:
+            return [word] if word in self.postings or word in self.range_postings else []
+        if self.deletions is None:
+            deletions: Dict[str, Set[str]] = {}
+            for w in self.vocabulary:
+                for variant in {w} | {w[:i] + w[i+1:] for i in range(len(w))}:
+                    deletions.setdefault(variant, set()).add(w)
+            self.deletions = deletions
+        candidates: Set[str] = set()
+        for variant in {word} | {word[:i] + word[i+1:] for i in range(len(word))}:
+            candidates |= self.deletions.get(variant, set())
+        # Deletion variants also match distance 2 transformations, keep only distance 1
+        return sorted(w for w in candidates if _EditDistance(w, word, 1) <= 1)
+
+    def Records(self, alternatives: List[List[str]]) -> Iterator[int]:
+        """Record indexes of individual names containing a word of each alternatives list, in codepoint order"""
+        if len(alternatives) == 1 and len(alternatives[0]) == 1:
+            return iter(self.postings.get(alternatives[0][0], ()))
+        result = -1
+        for words in alternatives:
+            result &= self.Union(words)
+        return _Bits(result)
+
+    def Union(self, words: List[str]) -> int:
+        """Bitmap of records containing one of words.  Unions are cached too, since as user types, the same
+        prefixes expanded to many words come again"""
+        if len(words) == 1:
+            return self.Bitmap(words[0])
+        key = tuple(words)
+        bitmap = self.unions.get(key)
+        if bitmap is None:
+            bitmap = 0
+            for w in words:
+                bitmap |= self.Bitmap(w)
+            if len(self.unions) >= 256:
+                self.unions.clear()
+            self.unions[key] = bitmap
+        return bitmap
+
+    def Ranges(self, alternatives: List[List[str]], words: List[str], last_is_prefix: bool) -> List[Tuple[int, int]]:
+        """(first, last) of codepoints of ranges matching the query, in codepoint order: for each alternatives list,
+        names prefix contains one of its words, or else query word is the hexadecimal codepoint ending the name
+        (or starts it, for last word with last_is_prefix), such as 4E00 for CJK IDEOGRAPH - 4E00"""
+        tables = self.tables
+        matching = [{r for w in ws for r in self.range_postings.get(w, ())} for ws in alternatives]
+        result: List[Tuple[int, int]] = []
+        for r in range(len(tables.range_prefixes)):
+            bounds = [(tables.range_firsts[r], tables.range_lasts[r])]
+            for j, rs in enumerate(matching):
+                if r not in rs:
+                    prefix = last_is_prefix and j == len(words)-1
+                    bounds = [sub for (first, last) in bounds for sub in _HexaRanges(words[j], first, last, prefix)]
+                    if not bounds:
+                        break
+            result.extend(bounds)
+        return result
+
+    def Search(self, words: List[str], last_is_prefix: bool, max_distance: int) -> Iterator[int]:
+        alternatives = [self.FuzzyWords(w, max_distance) if max_distance else [w] for w in words]
+        if last_is_prefix and words:
+            alternatives[-1] = self.PrefixWords(words[-1])
+        tables = self.tables
+        individual = (tables.codepoints[k] for k in self.Records(alternatives))
+        ranges = (range(first, last+1) for (first, last) in self.Ranges(alternatives, words, last_is_prefix))
+        return merge(individual, *ranges)
+
+    def Complete(self, prefix: str) -> Iterator[int]:
+        """Codepoints of individual names starting with prefix in names order, then codepoints of ranges whose
+        names prefix - XXXX start with prefix"""
+        tables = self.tables
+        k = bisect_left(self.sorted_names, (prefix,))
+        while k < len(self.sorted_names) and self.sorted_names[k][0].startswith(prefix):
+            yield tables.codepoints[self.sorted_names[k][1]]
+            k += 1
+        for r, p in enumerate(tables.range_prefixes):
+            name_prefix = tables.prefixes[p] + ' - '
+            if name_prefix.startswith(prefix):
+                yield from range(tables.range_firsts[r], tables.range_lasts[r]+1)
+            elif prefix.startswith(name_prefix):
+                for (first, last) in _HexaRanges(prefix[len(name_prefix):], tables.range_firsts[r], tables.range_lasts[r], True):
+                    yield from range(first, last+1)
+
+
+def _HexaRanges(hexa: str, first: int, last: int, prefix: bool) -> List[Tuple[int, int]]:
+    """Sub-ranges of first..last, in increasing order, of codepoints written hexa in names (uppercase hexadecimal
+    without leading 0), or with prefix, whose hexadecimal starts with hexa"""
+    if not re.fullmatch('[0-9A-F]*', hexa) or hexa.startswith('0'):
+        return []
+    if not hexa:
+        return [(first, last)] if prefix else []
+    value = int(hexa, 16)
+    if not prefix:
+        return [(value, value)] if first <= value <= last else []
+    # Codepoints written with hexa followed by 0 to 6-len(hexa) digits
+    result = []
+    for digits in range(7 - len(hexa)):
+        low = max(value << 4*digits, 1 << 4*(len(hexa)+digits-1), first)
+        high = min(((value+1) << 4*digits) - 1, last)
+        if low <= high:
+            result.append((low, high))
+    return result
+
+def _Bits(bitmap: int) -> Iterator[int]:
+    """Indexes of bits set in a bitmap, in increasing order"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for m in re.finditer(b'[^\x00]', data):
+        byte = data[m.start()]
+        for bit in range(8):
+            if byte >> bit & 1:
+                yield (m.start() << 3) + bit
+
+def _EditDistance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit+1 if it's greater than limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b)+1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j]+1, current[j-1]+1, previous[j-1]+(ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+_name_index: Optional[_NameIndex] = None
+
+
+def _GetNameIndex() -> _NameIndex:
+    global _name_index
+    if _name_index is None:
+        with _lock:
+            if _name_index is None:
+                _name_index = _NameIndex(_GetTables())
+    return _name_index
+
+def SearchNames(query: str, last_is_prefix: bool = False, fuzzy: bool = False) -> Iterator[int]:
+    """Codepoints whose name contains all words of query, in increasing order.  With last_is_prefix, last word of
+    query only needs to start a word of the name (search as user types).  With fuzzy, words of query also match
+    words of names at edit distance 1.  A hexadecimal word also matches the codepoint ending names of ranges, so
+    ideograph 4E00 finds CJK IDEOGRAPH - 4E00.  Results are computed as iterated, use GetPage to get a page"""
+    words = [w for w in _WORD_SPLIT.split(query.upper()) if w]
+    if not words:
+        return iter(())
+    return _GetNameIndex().Search(words, last_is_prefix, 1 if fuzzy else 0)
+
+def CompleteName(prefix: str) -> Iterator[int]:
+    """Codepoints whose name starts with prefix, in names order (names of ranges come last)"""
+    return _GetNameIndex().Complete(prefix.upper())
+
+def GetPage(results: Iterable[int], page: int, page_size: int = 50) -> List[int]:
+    """Page number page (from 0) of a search results iterator, only results up to this page are computed"""
+    return list(islice(results, page*page_size, (page+1)*page_size))
+
+
+# Sets of codepoints as bitsets over the whole codepoint space, for property queries
+class CodepointSet:
+    """Immutable set of codepoints, stored as a Python int with bit cp set for each codepoint cp.  Supports
+    & | ^ - and ~ (complement in 0..MAXCODEPOINT), in, len and iteration in increasing order"""
+
+    __slots__ = ('bits',)
+    _ALL = (1 << (MAXCODEPOINT+1)) - 1
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @staticmethod
+    def FromRanges(ranges: Iterable[Tuple[int, int]]) -> 'CodepointSet':
+        bits = 0
+        for (first, last) in ranges:
+            bits |= ((1 << (last-first+1)) - 1) << first
+        return CodepointSet(bits)
+
+    def __and__(self, other: 'CodepointSet') -> 'CodepointSet':
+        return CodepointSet(self.bits & other.bits)
+
+    def __or__(self, other: 'CodepointSet') -> 'CodepointSet':
+        return CodepointSet(self.bits | other.bits)
+
+    def __xor__(self, other: 'CodepointSet') -> 'CodepointSet':
+        return CodepointSet(self.bits ^ other.bits)
+
+    def __sub__(self, other: 'CodepointSet') -> 'CodepointSet':
+        return CodepointSet(self.bits & ~other.bits)
+
+    def __invert__(self) -> 'CodepointSet':
+        return CodepointSet(self.bits ^ self._ALL)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CodepointSet) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __contains__(self, cp: int) -> bool:
+        return cp >= 0 and self.bits >> cp & 1 == 1
+
+    def __len__(self) -> int:
+        return bin(self.bits).count('1')
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __iter__(self) -> Iterator[int]:
+        return _Bits(self.bits)
+
+    def __repr__(self) -> str:
+        return f'CodepointSet({self.Ranges()!r})' if self.bits.bit_length() < 1000 else f'CodepointSet(<{len(self.Ranges())} ranges>)'
+
+    def Ranges(self) -> List[Tuple[int, int]]:
+        """Compact list of (first, last) ranges of consecutive codepoints"""
+        # Starts of runs are set bits whose previous bit is clear, ends are set bits whose next bit is clear
+        starts = _Bits(self.bits & ~(self.bits << 1))
+        ends = _Bits(self.bits & ~(self.bits >> 1))
+        return list(zip(starts, ends))
+
+    def Regex(self) -> str:
+        """Regular expression character class matching the codepoints of the set, for re module"""
+        def Char(cp: int) -> str:
+            if 0x21 <= cp <= 0x7E:
+                return '\\' + chr(cp) if chr(cp) in '\\]^-[' else chr(cp)
+            return f'\\x{cp:02X}' if cp <= 0xFF else f'\\u{cp:04X}' if cp <= 0xFFFF else f'\\U{cp:08X}'
+        ranges = self.Ranges()
+        if not ranges:
+            return '[^\\x00-\\U0010FFFF]'
+        return '[' + ''.join(Char(first) if first == last else Char(first) + ('' if last == first+1 else '-') + Char(last)
+                             for first, last in ranges) + ']'
+
+
+def _BlockMasks(blocks, count: int) -> List[Dict[int, bytes]]:
+    """For each distinct block of a two-stage table, value -> bits of the codepoints of the block having this value"""
+    result = []
+    for b in range(len(blocks) >> _BLOCK_SHIFT):
+        acc: Dict[int, int] = {}
+        for i, value in enumerate(blocks[b << _BLOCK_SHIFT:(b+1) << _BLOCK_SHIFT]):
+            acc[value] = acc.get(value, 0) | 1 << i
+        result.append({value: bits.to_bytes(_BLOCK_SIZE // 8, 'little') for value, bits in acc.items()})
+    return result
+
+
+# Sets per 'category:Lu' and 'script:Greek', computed on first use (about 140 KB each), from block masks of
+# category and script tables
+_property_sets: Dict[str, CodepointSet] = {}
+_block_masks: Dict[str, List[Dict[int, bytes]]] = {}
+
+
+def _PropertySet(kind: str, value: str) -> CodepointSet:
+    key = kind + ':' + value
+    cs = _property_sets.get(key)
+    if cs is None:
+        with _lock:
+            tables = _GetTables()
+            (names, stage1, blocks) = ((tables.categories, tables.category_index, tables.category_blocks) if kind == 'category'
+                                       else (tables.scripts, tables.script_index, tables.script_blocks))
+            if kind not in _block_masks:
+                _block_masks[kind] = _BlockMasks(blocks, len(names))
+            masks = _block_masks[kind]
+            if value not in names:
+                return CodepointSet()
+            v = names.index(value)
+            bits = bytearray((MAXCODEPOINT+1) // 8)
+            size = _BLOCK_SIZE // 8
+            for pos, b in enumerate(stage1):
+                m = masks[b].get(v)
+                if m:
+                    bits[pos*size:(pos+1)*size] = m
+            cs = _property_sets[key] = CodepointSet(int.from_bytes(bits, 'little'))
+    return cs
+
+def CategorySet(category: str) -> CodepointSet:
+    """Codepoints of a general category such as Lu, or of all categories of a major class such as L; unknown
+    categories give an empty set"""
+    if len(category) == 1:
+        result = CodepointSet()
+        for c in _GetTables().categories:
+            if c.startswith(category):
+                result |= _PropertySet('category', c)
+        return result
+    return _PropertySet('category', category)
+
+def ScriptSet(script: str) -> CodepointSet:
+    """Codepoints of a script such as Greek ('Unknown' includes unassigned codepoints)"""
+    return _PropertySet('script', script)
+
+def AssignedSet() -> CodepointSet:
+    return ~_PropertySet('category', '??')
+
+def RangeSet(first: int, last: int) -> CodepointSet:
+    return CodepointSet.FromRanges([(first, last)])
+
+
+# Optional properties, read from optional files (see _PROPERTY_FILES), default values are returned when the file
+# defining a property is missing
+def GetPropertyValue(prop: str, cp: int, default: Optional[str] = None) -> Optional[str]:
+    """Value of property prop ('Block', 'Age'...) for codepoint cp, or default if cp has no value"""
+    table = (_tables or _GetTables()).RangeTable(prop)
+    value = table.Value(cp) if table else None
+    return default if value is None else value
+
+def HasProperty(cp: int, prop: str) -> bool:
+    """True if cp has binary property prop, such as Emoji or Extended_Pictographic (from emoji-data.txt)"""
+    return GetPropertyValue(prop, cp) is not None
+
+def GetPropertySet(prop: str, value: str = 'Y') -> CodepointSet:
+    """Codepoints having a property value, or a binary property"""
+    table = _GetTables().RangeTable(prop)
+    return CodepointSet.FromRanges(table.Ranges(value)) if table else CodepointSet()
+
+def GetLoadedProperties() -> List[str]:
+    return sorted(_GetTables().properties)
+
+def GetBlock(cp: int) -> str:
+    return GetPropertyValue('Block', cp, 'No_Block')
+
+def GetAge(cp: int) -> str:
+    return GetPropertyValue('Age', cp, 'Unassigned')
+
+def GetNameAliases(cp: int) -> List[Tuple[str, str]]:
+    """(alias, type) list of codepoint cp, type being correction, control, alternate, figment or abbreviation"""
+    table = (_tables or _GetTables()).RangeTable('Name_Alias')
+    return [tuple(value.split(';', 1)) for value in table.Values(cp)] if table else []     # type: ignore
+
+
+# Row of GetDetails: codepoint hexa, name, script, category, UTF-16 and UTF-8 encodings in hexadecimal
+CharacterDetails = Tuple[str, str, str, str, str, str]
+
+
+def GetDetails(chars: Union[str, Iterable[int]]) -> List[CharacterDetails]:
+    """Details of each character of a string (or each codepoint of an iterable), same values as GetCodepointHexa,
+    GetName, GetScript, GetCategory, GetUTF16String and GetUTF8String, computed in one pass: properties are
+    looked up once per distinct codepoint, and encodings are slices of the whole string encoded at once.
+    Surrogates are encoded as themselves"""
+    text = chars if isinstance(chars, str) else ''.join(map(chr, chars))
+    # Encoded bytes in hexadecimal, 'XX ' per UTF-8 byte, 'XXXX ' per UTF-16 code unit
+    utf8 = text.encode('utf-8', 'surrogatepass').hex(' ').upper()
+    utf16 = text.encode('utf-16-be', 'surrogatepass').hex(' ', 2).upper()
+    tables = _tables or _GetTables()
+    (categories, scripts, Category, Script) = (tables.categories, tables.scripts, tables.Category, tables.Script)
+    properties: Dict[int, Tuple[str, str, str, str]] = {}
+    result: List[CharacterDetails] = []
+    (p8, p16) = (0, 0)
+    for ch in text:
+        cp = ord(ch)
+        prop = properties.get(cp)
+        if prop is None:
+            category = Category(cp)
+            name = tables.CodepointName(cp) if category else f"Unassigned codepoint - {cp:04X}"
+            prop = properties[cp] = (f'U+{cp:04X}', name, scripts[Script(cp)], categories[category])
+        n8 = 3 * (1 if cp < 0x80 else 2 if cp < 0x800 else 3 if cp < 0x10000 else 4)
+        n16 = 5 if cp < 0x10000 else 10
+        result.append(prop + (utf16[p16:p16+n16-1], utf8[p8:p8+n8-1]))
+        (p8, p16) = (p8+n8, p16+n16)
+    return result
+
+
+# Several Unicode versions side by side
+class _StoredVersion:
+    """One version of a UnicodeVersionStore: block indexes in the store's blocks pool for category and script
+    (global codes), individual codepoints and their ids in the store's names list, and ranges (shared tuples
+    (first, last, prefix))"""
+
+    def __init__(self, version: str, category_index: array, script_index: array, codepoints: array, name_ids: array,
+                 ranges: List[Tuple[int, int, str]]):
+        self.version = version
+        self.category_index = category_index
+        self.script_index = script_index
+        self.codepoints = codepoints
+        self.name_ids = name_ids
+        self.ranges = ranges
+        self.range_firsts = [r[0] for r in ranges]
+
+
+class UnicodeVersionStore:
+    """UCD data of several Unicode versions, each one added from a directory of UCD files with AddVersion.
+    Storage is shared between versions: blocks of the two-stage category and script tables are stored once in a
+    pool (most blocks don't change between versions), names are stored once, and so are identical ranges.
+    Categories and scripts are coded in lists common to all versions, so that identical blocks have the same id
+    in all versions: Diff only compares blocks whose ids differ"""
+
+    def __init__(self):
+        self.versions: Dict[str, _StoredVersion] = {}
+        self.categories: List[str] = ['??']
+        self.scripts: List[str] = ['Unknown']
+        self.blocks: List[bytes] = []
+        self.names: List[str] = []
+        self._block_ids: Dict[bytes, int] = {}
+        self._name_ids: Dict[str, int] = {}
+        self._ranges: Dict[Tuple[int, int, str], Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _Code(self, values: List[str], value: str) -> int:
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def _Pool(self, stage1, blocks, remap: bytes) -> array:
+        """Blocks of a two-stage table added to pool after translation of codes, returns pool ids of stage1 blocks"""
+        ids = []
+        for b in range(len(blocks) >> _BLOCK_SHIFT):
+            block = bytes(blocks[b << _BLOCK_SHIFT:(b+1) << _BLOCK_SHIFT]).translate(remap)
+            if block not in self._block_ids:
+                self._block_ids[block] = len(self.blocks)
+                self.blocks.append(block)
+            ids.append(self._block_ids[block])
+        return array('I', [ids[b] for b in stage1])
+
+    def AddVersion(self, label: str, directory: str) -> None:
+        """Add version found in directory (UnicodeVersion.txt, UnicodeData.txt and Scripts.txt), uses and writes
+        compiled cache UniData.bin in this directory as the main tables do"""
+        tables = _LoadTables(os.path.abspath(directory))
+        with self._lock:
+            category_map = bytes([self._Code(self.categories, c) for c in tables.categories]).ljust(256, b'\0')
+            script_map = bytes([self._Code(self.scripts, sc) for sc in tables.scripts]).ljust(256, b'\0')
+            name_ids = array('I')
+            for k in range(len(tables.codepoints)):
+                name = tables.Name(k)
+                name_ids.append(self._name_ids.setdefault(name, len(self._name_ids)))
+                if name_ids[-1] == len(self.names):
+                    self.names.append(name)
+            ranges = []
+            for first, last, prefix in zip(tables.range_firsts, tables.range_lasts, tables.range_prefixes):
+                r = (first, last, tables.prefixes[prefix])
+                ranges.append(self._ranges.setdefault(r, r))
+            self.versions[label] = _StoredVersion(tables.version, self._Pool(tables.category_index, tables.category_blocks, category_map),
+                                                  self._Pool(tables.script_index, tables.script_blocks, script_map),
+                                                  array('I', tables.codepoints), name_ids, ranges)
+
+    def Versions(self) -> List[str]:
+        return list(self.versions)
+
+    def _Category(self, v: _StoredVersion, cp: int) -> int:
+        return self.blocks[v.category_index[cp >> _BLOCK_SHIFT]][cp & _BLOCK_MASK]
+
+    def _Script(self, v: _StoredVersion, cp: int) -> int:
+        return self.blocks[v.script_index[cp >> _BLOCK_SHIFT]][cp & _BLOCK_MASK]
+
+    def _Name(self, v: _StoredVersion, cp: int) -> str:
+        k = bisect_left(v.codepoints, cp)
+        if k < len(v.codepoints) and v.codepoints[k] == cp:
+            return self.names[v.name_ids[k]]
+        r = v.ranges[bisect_right(v.range_firsts, cp) - 1]
+        return f'{r[2]} - {cp:X}'
+
+    def GetRecord(self, label: str, cp: int) -> Optional[CharacterRecord]:
+        """CharacterRecord of cp in version label, or None if cp is not assigned in this version"""
+        v = self.versions[label]
+        if not 0 <= cp <= MAXCODEPOINT:
+            return None
+        category = self._Category(v, cp)
+        if category == 0:
+            return None
+        return CharacterRecord(cp, self._Name(v, cp), self.categories[category], self.scripts[self._Script(v, cp)])
+
+    def History(self, cp: int) -> List[Tuple[str, Optional[CharacterRecord]]]:
+        """(label, record or None) of cp in each version, in order of addition"""
+        return [(label, self.GetRecord(label, cp)) for label in self.versions]
+
+    def Diff(self, old: str, new: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Changes from version old to version new as (first, last) range lists: assigned (new codepoints),
+        unassigned (removed), category and script (changed for codepoints assigned in both versions)"""
+        (vo, vn) = (self.versions[old], self.versions[new])
+        changes: Dict[str, List[int]] = {'assigned': [], 'unassigned': [], 'category': [], 'script': []}
+        for b in range(len(vo.category_index)):
+            (co, cn, so, sn) = (vo.category_index[b], vn.category_index[b], vo.script_index[b], vn.script_index[b])
+            if co == cn and so == sn:
+                continue
+            # Per block, ints with one byte per codepoint, 1 when a condition is true, so that bit 8*i is codepoint i
+            (ao, an) = (_ByteFlags(self.blocks[co]), _ByteFlags(self.blocks[cn]))
+            both = ao & an
+            masks = (('assigned', an & ~ao), ('unassigned', ao & ~an),
+                     ('category', both & _DiffFlags(self.blocks[co], self.blocks[cn]) if co != cn else 0),
+                     ('script', both & _DiffFlags(self.blocks[so], self.blocks[sn]) if so != sn else 0))
+            for kind, mask in masks:
+                changes[kind].extend((b << _BLOCK_SHIFT) + (bit >> 3) for bit in _Bits(mask))
+        return {kind: _ToRanges(cps) for kind, cps in changes.items()}
+
+
+_NONZERO = bytes([0] + [1]*255)
+
+
+def _ByteFlags(block: bytes) -> int:
+    """Int with a byte 1 for each non-zero byte of block, 0 for zero bytes"""
+    return int.from_bytes(block.translate(_NONZERO), 'little')
+
+def _DiffFlags(a: bytes, b: bytes) -> int:
+    """Int with a byte 1 where a and b differ"""
+    x = int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')
+    return _ByteFlags(x.to_bytes(len(a), 'little'))
+
+def _ToRanges(cps: List[int]) -> List[Tuple[int, int]]:
+    """Sorted codepoints list as (first, last) ranges"""
+    ranges: List[Tuple[int, int]] = []
+    for cp in cps:
+        if ranges and ranges[-1][1] == cp-1:
+            ranges[-1] = (ranges[-1][0], cp)
+        else:
+            ranges.append((cp, cp))
+    return ranges
+
+
 def AsString(cp: int) -> str:
     if cp<0:
         print('cp:', cp)
@@ -157,19 +1229,18 @@ unknown = CharacterRecord(-1, 'Unknown character', '??', 'Unknown')
 
 
 def GetName(cp: int) -> str:
-    cr = _codepoint_map.get(cp, None)
-    return cr.Name if cr else f"Unassigned codepoint - {cp:04X}"
+    return (_tables or _GetTables()).CodepointName(cp) if IsValidCodepoint(cp) else f"Unassigned codepoint - {cp:04X}"
 
 def GetCategory(cp: int) -> str:
-    cr = _codepoint_map.get(cp, None)
-    return cr.Category if cr else "??"
+    tables = _tables or _GetTables()
+    return tables.categories[tables.Category(cp)] if 0 <= cp <= MAXCODEPOINT else "??"
 
 def GetScript(cp: int) -> str:
-    cr = _codepoint_map.get(cp, None)
-    return cr.Script if cr else "Unknown"
+    tables = _tables or _GetTables()
+    return tables.scripts[tables.Script(cp)] if 0 <= cp <= MAXCODEPOINT else "Unknown"
 
 def IsValidCodepoint(cp: int) -> bool:
-    return cp in _codepoint_map
+    return 0 <= cp <= MAXCODEPOINT and (_tables or _GetTables()).Category(cp) != 0
 
 def IsSurrogate(cp: int) -> bool:
     return 0xD800 <= cp <= 0xDFFF
@@ -203,3 +1274,18 @@ if __name__ == '__main__':
     print('|'+GetCodepointHexa(0xCAFE)+'|'+GetName(0xCAFE))
     print('|'+GetCodepointHexa(0x1CAFE)+'|'+GetName(0x1CAFE))
     print('|'+GetCodepointHexa(0x10CAFE)+'|'+GetName(0x10CAFE))
+
+    print('----- Names search tests')
+    print([GetCodepointHexa(cp) for cp in GetPage(SearchNames('arrow left'), 0, 10)])
+    print([GetName(cp) for cp in GetPage(SearchNames('greek capital letter al', last_is_prefix=True), 0, 5)])
+    print([GetName(cp) for cp in GetPage(SearchNames('arow lefft', fuzzy=True), 0, 3)])
+    print([GetName(cp) for cp in GetPage(CompleteName('cjk ideograph - 4e0'), 0, 3)])
+
+    print('----- Codepoint sets tests')
+    print((ScriptSet('Greek') & CategorySet('Lu')).Ranges()[:5])
+    print(len(ScriptSet('Cyrillic') & CategorySet('Mn')), (ScriptSet('Cyrillic') & CategorySet('Mn')).Regex())
+    print(len(AssignedSet()), len(~AssignedSet() & RangeSet(0, 0xFFFF)))
+
+    print('----- Optional properties tests')
+    print(GetLoadedProperties())
+    print(GetBlock(0x1F417), GetAge(0x1F417), HasProperty(0x1F417, 'Emoji_Presentation'), GetNameAliases(0xFEFF))
@@ -0,0 +1,265 @@
+# Module UniDataServer.py
+# Local lookup service for UniData: one warm process answers codepoint metadata requests from several tools
+# Protocol is JSON lines over localhost TCP or a Unix socket, one request object per line, one response per line:
+#   {"id": 1, "op": "describe", "cp": 65}              -> {"id": 1, "result": [{"cp": 65, "hexa": "U+0041", ...}]}
+#   {"id": 2, "op": "describe", "text": "Aé"}           (or "cps": [65, 233])
+#   {"id": 3, "op": "search", "query": "arrow left", "prefix": false, "fuzzy": false, "page": 0, "page_size": 50}
+#   {"id": 4, "op": "fromname", "name": "BOAR"}
+#   {"id": 5, "op": "stats"}
+# Errors are returned as {"id": ..., "error": "message"}.  A request line longer than the limit (--max-request MB) gets
+# an error with id null, and the connection goes on with next line.  Requests of a connection are processed concurrently, so
+# responses may come back in a different order, use id to match them.
+# Concurrent describe requests, from all connections, are coalesced in a single UniData.GetDetails call per batch.
+#
+# 2026-10-18    PV
+
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import UniData
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_REQUEST = 16 * 1024 * 1024      # Bytes per request line, describe of a text uses up to 6 bytes per character
+
+
+class LookupService:
+    """Batched lookups and statistics, shared by all connections.  A describe request is queued with its codepoints,
+    and the batcher task waits up to max_delay (s) after the first queued request to collect others, up to max_batch
+    codepoints, then computes all of them in one pass.  max_request is the maximum length of a request line (bytes)"""
+
+    def __init__(self, max_batch: int = 4096, max_delay: float = 0.001, max_request: int = DEFAULT_MAX_REQUEST):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_request = max_request
+        self.queue: 'asyncio.Queue[Tuple[List[int], asyncio.Future]]' = asyncio.Queue()
+        self.start = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_codepoints = 0
+        self.latencies: Deque[float] = deque(maxlen=10000)      # Seconds, last requests
+
+    async def Describe(self, cps: List[int]) -> List[Dict[str, Any]]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((cps, future))
+        return await future
+
+    async def Batcher(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            count = self.Drain(batch, len(batch[0][0]))
+            if count < self.max_batch and self.max_delay > 0:
+                # Leave time to other requests to come
+                await asyncio.sleep(self.max_delay)
+                count = self.Drain(batch, count)
+
+            try:
+                rows = UniData.GetDetails([cp for cps, _ in batch for cp in cps])
+                self.batches += 1
+                self.batched_requests += len(batch)
+                self.batched_codepoints += count
+                p = 0
+                for cps, future in batch:
+                    if not future.done():
+                        future.set_result([_Row(cp, row) for cp, row in zip(cps, rows[p:p+len(cps)])])
+                    p += len(cps)
+            except Exception as e:
+                # Batcher must keep running: requests of the failed batch get the error, others are not affected
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def Drain(self, batch: List[Tuple[List[int], asyncio.Future]], count: int) -> int:
+        """Add requests already queued to batch, up to max_batch codepoints, returns count of codepoints"""
+        while count < self.max_batch and not self.queue.empty():
+            item = self.queue.get_nowait()
+            batch.append(item)
+            count += len(item[0])
+        return count
+
+    async def Execute(self, request: Dict[str, Any]) -> Any:
+        op = request.get('op')
+        if op == 'describe':
+            return await self.Describe(_Codepoints(request))
+        if op == 'search':
+            results = UniData.SearchNames(str(request['query']), bool(request.get('prefix', False)), bool(request.get('fuzzy', False)))
+            return UniData.GetPage(results, int(request.get('page', 0)), int(request.get('page_size', 50)))
+        if op == 'fromname':
+            return UniData.GetCodepointFromName(str(request['name']))
+        if op == 'stats':
+            return self.Stats()
+        raise ValueError(f'Unknown op {op!r}')
+
+    async def Request(self, line: bytes) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        self.requests += 1
+        rid = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('Request must be a JSON object')
+            rid = request.get('id')
+            response = {'id': rid, 'result': await self.Execute(request)}
+        except Exception as e:
+            # Invalid requests (ValueError, KeyError, TypeError), but also unexpected failures, are reported to client
+            self.errors += 1
+            response = {'id': rid, 'error': f'{type(e).__name__}: {e}'}
+        self.latencies.append(time.perf_counter() - t0)
+        return response
+
+    def Stats(self) -> Dict[str, Any]:
+        uptime = time.perf_counter() - self.start
+        latencies = sorted(self.latencies)
+
+        def Percentile(p: float) -> float:
+            return round(latencies[min(len(latencies)-1, int(p * len(latencies)))] * 1000, 3) if latencies else 0.0
+
+        return {
+            'uptime_s': round(uptime, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'requests_per_s': round(self.requests / uptime, 1) if uptime > 0 else 0.0,
+            'batches': self.batches,
+            'requests_per_batch': round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            'codepoints_per_batch': round(self.batched_codepoints / self.batches, 2) if self.batches else 0.0,
+            'latency_ms': {'p50': Percentile(0.5), 'p95': Percentile(0.95), 'p99': Percentile(0.99), 'max': Percentile(1.0)},
+        }
+
+    async def Connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = set()
+
+        async def Answer(line: Optional[bytes]) -> None:
+            if line is None:
+                self.requests += 1
+                self.errors += 1
+                response: Dict[str, Any] = {'id': None, 'error': f'Request too large, limit is {self.max_request} bytes'}
+            else:
+                response = await self.Request(line)
+            if writer.is_closing():
+                return
+            try:
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+            except (ConnectionError, RuntimeError):
+                # Client went away (reset, broken pipe, or transport already closed): nobody to answer
+                pass
+
+        async def ReadLine() -> Optional[bytes]:
+            """Next request line, b'' at end of stream, None for a line longer than limit, which is skipped"""
+            too_large = False
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.LimitOverrunError as e:
+                    # Discard the part of the line in buffer, and go on until its end
+                    too_large = True
+                    await reader.readexactly(e.consumed)
+                    continue
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial
+                return None if too_large else line
+
+        try:
+            while True:
+                line = await ReadLine()
+                if line == b'':
+                    break
+                if line is None or line.strip():
+                    task = asyncio.ensure_future(Answer(line))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _Codepoints(request: Dict[str, Any]) -> List[int]:
+    if 'text' in request:
+        return [ord(ch) for ch in str(request['text'])]
+    cps = request['cps'] if 'cps' in request else [request['cp']]
+    result = [int(cp, 16) if isinstance(cp, str) else int(cp) for cp in cps]
+    for cp in result:
+        if not 0 <= cp <= UniData.MAXCODEPOINT:
+            raise ValueError(f'Invalid codepoint {cp}')
+    return result
+
+def _Row(cp: int, row: UniData.CharacterDetails) -> Dict[str, Any]:
+    return {'cp': cp, 'hexa': row[0], 'name': row[1], 'script': row[2], 'category': row[3], 'utf16': row[4], 'utf8': row[5]}
+
+
+async def Serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, path: Optional[str] = None,
+                max_batch: int = 4096, max_delay: float = 0.001, max_request: int = DEFAULT_MAX_REQUEST) -> None:
+    """Run service until cancelled, on Unix socket path if specified, else on host:port"""
+    UniData.GetCategory(0)      # Load tables before accepting requests
+    service = LookupService(max_batch, max_delay, max_request)
+    batcher = asyncio.ensure_future(service.Batcher())
+    if path:
+        server = await asyncio.start_unix_server(service.Connection, path, limit=max_request)
+    else:
+        server = await asyncio.start_server(service.Connection, host, port, limit=max_request)
+    print('UniData service on', path or f'{host}:{port}', file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher.cancel()
+
+
+class Client:
+    """Simple synchronous client for tools, one request at a time"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, path: Optional[str] = None):
+        if path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile('rwb')
+        self.id = 0
+
+    def Call(self, op: str, **args) -> Any:
+        self.id += 1
+        args.update({'id': self.id, 'op': op})
+        self.file.write(json.dumps(args).encode('utf-8') + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError('UniData service closed the connection')
+        response = json.loads(line)
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response['result']
+
+    def Close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='UniData lookup service, JSON lines over TCP or Unix socket')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on, default is 127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help=f'TCP port, default is {DEFAULT_PORT}')
+    parser.add_argument('-u', '--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--batch', type=int, default=4096, help='maximum codepoints per batch, default is 4096')
+    parser.add_argument('--delay', type=float, default=1.0, help='maximum wait in ms to fill a batch, default is 1')
+    parser.add_argument('--max-request', type=float, default=DEFAULT_MAX_REQUEST / 1024**2,
+                        help=f'maximum size of a request line in MB, default is {DEFAULT_MAX_REQUEST // 1024**2}')
+    args = parser.parse_args()
+    try:
+        asyncio.run(Serve(args.host, args.port, args.unix, args.batch, args.delay / 1000, int(args.max_request * 1024**2)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
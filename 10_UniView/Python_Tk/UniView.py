@@ -4,6 +4,7 @@
 # 2020-09-03    PV      1.1: Unicode 13, Tcl support >0xFFFF, list contains UTF-8 and UTF-16
 # 2020-12-31    PV      1.2: Added Scripts
 # 2021-01-01    PV      1.3: Treeview version
+# 2026-10-18    PV      1.4: Treeview rows computed by UniData.GetDetails for the whole string
 
 import unicodedata
 import re
@@ -21,7 +22,7 @@ from typing import Match   # , Text
 
 # General app info
 APP_TITLE = "UniView Py Tk"
-APP_VERSION = "1.3"
+APP_VERSION = "1.4"
 APP_DESCRIPTION = "Details Unicode characters entered in a text box, and support some Unicode transformations."
 APP_PRODUCT = "UniView DevForFun App #8, Python+Tkinter"
 APP_COPYRIGHT = "Copyright ©2018-2020 Pierre Violent"
@@ -151,10 +152,7 @@ def Transform() -> None:
     # adjust the column's width to the header string since adding data will only make it grow
     for col in list_headers:
         tree.column(col, width=tkFont.Font().measure(col.title()))
-    for ch in s:
-        c = ord(ch)
-        item = (f'U+{c:04X}', UniData.GetName(c), UniData.GetScript(c),
-                UniData.GetCategory(c), UniData.GetUTF16String(c), UniData.GetUTF8String(c))
+    for item in UniData.GetDetails(s):
         tree.insert('', 'end', values=item)
         # adjust column's width if necessary to fit each value
         for ix, val in enumerate(item):